@@ -1,17 +1,41 @@
+import asyncio
 import io
-import os
 from app.core.w_logging import get_logger
-from app.services.rawdata.dat import DAT
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
 from firebase_admin import storage, firestore
 from app.core.firebase.auth import get_current_user
-from app.models.project import Usemap, Project
-from app.services.io import build_map, get_chkt, get_map
-from app.services.rawdata.chk import CHK
+from app.models.build import BuildJob
+from app.models.project import UsemapOptions, Project
+from app.services.encoding import (
+  MEDIA_TYPES,
+  Encoding,
+  content_encoding,
+  envelope_parts,
+  negotiate,
+)
+from app.services.io import (
+  MapBodyError,
+  build_map_content,
+  get_definitions_json,
+  load_serialized_map,
+  parse_map_summary,
+)
+from app.services.cache import build_cache
+from app.services.jobs import build_jobs, build_key, dump_failed_body
+from app.services.workers import (
+  BuildTimeoutError,
+  WorkerBusyError,
+  build_pool,
+  worker_pool,
+)
 from io import BytesIO
 import uuid
 import datetime
+from itertools import chain
+from typing import Iterable, Optional
+from pydantic import ValidationError
 
 
 router = APIRouter()
@@ -19,8 +43,61 @@ router = APIRouter()
 upload_logger = get_logger("upload")
 
 
+def map_response(
+  raw_map: Iterable[bytes], encoding: Encoding, **fields
+) -> StreamingResponse:
+  """
+  Stream `fields` with already serialized `raw_map` chunks, without validating it into `Usemap`.
+  """
+  head, tail = envelope_parts(encoding, "raw_map", **fields)
+  return StreamingResponse(
+    chain((head,), raw_map, (tail,)),
+    media_type=MEDIA_TYPES[encoding],
+    headers={"Vary": "Accept"},
+  )
+
+
+def upload_blob(filename: str, content: bytes, content_type: Optional[str]) -> str:
+  """Upload map to storage and get public url. Blocking, run it on I/O pool."""
+  bucket = storage.bucket()
+  blob = bucket.blob(filename)
+  blob.upload_from_file(BytesIO(content), content_type=content_type)
+  blob.make_public()
+
+  return blob.public_url
+
+
+def delete_blob(filename: str):
+  """Blocking, run it on I/O pool."""
+  storage.bucket().blob(filename).delete()
+
+
+async def discard_upload(upload: asyncio.Task, filename: str):
+  """Delete what `upload` uploaded, once it's finished."""
+  try:
+    await upload
+  except Exception:
+    return
+
+  try:
+    await worker_pool.run_io(delete_blob, filename)
+  except Exception as e:
+    upload_logger.error(f"Cannot delete {filename} of failed upload, because of {e}.")
+
+
+def add_project(project: Project):
+  """Blocking, run it on I/O pool."""
+  db = firestore.client()
+  db.collection("projects").add(project.model_dump(mode="json"))
+
+
 @router.post("/upload/")
-async def upload_map(file: UploadFile = File(...), user=Depends(get_current_user)):
+async def upload_map(
+  file: UploadFile = File(...),
+  user=Depends(get_current_user),
+  options: UsemapOptions = Depends(),
+  accept: Optional[str] = Header(default=None),
+):
   """Get webditor-based transformed data by uploaded map."""
   user_id = user["user_id"]
   upload_logger.info(f"User {user_id} requested to upload {file.filename}.")
@@ -31,91 +108,222 @@ async def upload_map(file: UploadFile = File(...), user=Depends(get_current_user
     uid = user["uid"]
     filename = f"{uid}/{uuid.uuid4()}_{file.filename}"
     content = await file.read()
+    encoding = negotiate(accept)
+    if worker_pool.busy:
+      raise WorkerBusyError(f"{worker_pool.pending} jobs are already pending.")
 
-    bucket = storage.bucket()
-    blob = bucket.blob(filename)
-    blob.upload_from_file(BytesIO(content), content_type=file.content_type)
-    blob.make_public()
-    download_url = blob.public_url
-
-    chkt = get_chkt(BytesIO(content))
-    chk = CHK(chkt)
-    dat = DAT()
-
-    raw_map = get_map(chk, dat)
-
-    db = firestore.client()
-    project = Project(
-      uid=uid,
-      filename=file.filename,
-      path=filename,
-      url=download_url,
-      uploadedAt=datetime.datetime.now(datetime.UTC),
+    # Uploading overlaps parsing, and is deleted again when the map never becomes a project.
+    upload = asyncio.create_task(
+      worker_pool.run_io(upload_blob, filename, content, file.content_type)
     )
+    try:
+      raw_map = await load_serialized_map(content, options, encoding)
+      download_url = await upload
 
-    db.collection("projects").add(project.model_dump(mode="json"))
+      project = Project(
+        uid=uid,
+        filename=file.filename,
+        path=filename,
+        url=download_url,
+        uploadedAt=datetime.datetime.now(datetime.UTC),
+      )
+
+      await worker_pool.run_io(add_project, project)
+    except BaseException:
+      await asyncio.shield(discard_upload(upload, filename))
+      raise
 
     upload_logger.info(f"Upload {file.filename} was succesful.")
-    return {"url": download_url, "path": filename, "raw_map": raw_map}
+    return map_response(raw_map, encoding, url=download_url, path=filename)
 
+  except WorkerBusyError as e:
+    raise HTTPException(status_code=503, detail=str(e))
   except Exception as e:
     raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/open")
-async def open_map(file: UploadFile = File(...)):
+async def open_map(
+  file: UploadFile = File(...),
+  options: UsemapOptions = Depends(),
+  accept: Optional[str] = Header(default=None),
+):
+  try:
+    content = await file.read()
+    encoding = negotiate(accept)
+    raw_map = await load_serialized_map(content, options, encoding)
+
+    return map_response(raw_map, encoding, file_name=file.filename)
+  except WorkerBusyError as e:
+    raise HTTPException(status_code=503, detail=str(e))
+  except Exception as e:
+    raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/summary")
+async def get_summary(file: UploadFile = File(...)):
+  """Get map overview(dimensions, tileset, players, name and description) only."""
   try:
     content = await file.read()
-    chkt = get_chkt(BytesIO(content))
-    chk = CHK(chkt)
-    dat = DAT()
 
-    raw_map = get_map(chk, dat)
-    return {"file_name": file.filename, "raw_map": raw_map}
+    summary = await worker_pool.run_cpu(parse_map_summary, content)
+    return {"file_name": file.filename, "summary": summary}
+  except WorkerBusyError as e:
+    raise HTTPException(status_code=503, detail=str(e))
   except Exception as e:
     raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/test_map")
-async def get_test_map():
+async def get_test_map(
+  options: UsemapOptions = Depends(), accept: Optional[str] = Header(default=None)
+):
   with open("./example/various_units.scx", "rb") as f:
-    chkt = get_chkt(BytesIO(f.read()))
-    chk = CHK(chkt)
-    dat = DAT()
-    map = get_map(chk, dat)
+    content = f.read()
 
-    return map.model_dump(mode="json")
+  encoding = negotiate(accept)
+  try:
+    raw_map = await load_serialized_map(content, options, encoding)
+  except WorkerBusyError as e:
+    raise HTTPException(status_code=503, detail=str(e))
 
+  return StreamingResponse(
+    raw_map, media_type=MEDIA_TYPES[encoding], headers={"Vary": "Accept"}
+  )
 
-build_logger = get_logger("build")
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+  if if_none_match is None:
+    return False
 
-@router.post("/build")
-def get_build_map(map: Usemap):
-  build_logger.info("Started to building map.")
+  tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+  return "*" in tags or etag in tags
 
-  try:
-    map_bytes = build_map(map)
-  except Exception as e:
-    build_logger.critical(f"Building map was failed, because of {e}.")
-    timestamp = datetime.datetime.now(datetime.UTC).strftime("%Y%m%d_%H%M%S")
-    json_path = f"logs/map_{timestamp}.json"
-    os.makedirs("logs", exist_ok=True)
 
-    with open(json_path, mode="a", newline="") as f:
-      import json
+@router.get("/definitions")
+async def get_definitions(if_none_match: Optional[str] = Header(default=None)):
+  """
+  Get DAT-only definitions(flingy, sprite, image, order, portrait), which are same for every map.
+
+  Maps opened with `inline_definitions=false` leave these out. ETag is the content hash, so
+  `/definitions/{version}` with it never changes and can be cached forever.
+  """
+  serialized, etag = await worker_pool.run_io(get_definitions_json)
+  headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+
+  if etag_matches(if_none_match, etag):
+    return Response(status_code=304, headers=headers)
+
+  return Response(content=serialized, media_type="application/json", headers=headers)
 
-      json.dump(map.model_dump(mode="json"), f, indent=2)
-      build_logger.info(f"Map structure saved in {json_path}")
-    raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/definitions/{version}")
+async def get_versioned_definitions(
+  version: str, if_none_match: Optional[str] = Header(default=None)
+):
+  serialized, etag = await worker_pool.run_io(get_definitions_json)
+  if version != etag.strip('"'):
+    raise HTTPException(
+      status_code=404, detail=f"Unknown definitions version {version}"
+    )
+
+  headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+  if etag_matches(if_none_match, etag):
+    return Response(status_code=304, headers=headers)
+
+  return Response(content=serialized, media_type="application/json", headers=headers)
+
+
+build_logger = get_logger("build")
+
+
+def scx_response(map_bytes: bytes) -> StreamingResponse:
   buffer = io.BytesIO(map_bytes)
   buffer.seek(0)
 
-  build_logger.info("Building was succesful.")
-
   return StreamingResponse(
     buffer,
     media_type="application/octet-stream",
     headers={"content-Disposition": "attachment; filename=generated_map.scx"},
   )
+
+
+@router.post("/build")
+async def get_build_map(request: Request):
+  """
+  Build `Usemap` body encoded as JSON(default) or MessagePack, following `Content-Type`.
+
+  Body is decoded and built on a build worker process, the server never validates it. Body which
+  was built before is served from `build_cache`.
+  """
+  build_logger.info("Started to building map.")
+  body = await request.body()
+  encoding = content_encoding(request.headers.get("content-type"))
+  key = await worker_pool.run_io(build_key, body, encoding)
+
+  try:
+    map_bytes = await worker_pool.run_io(build_cache.get, key)
+    if map_bytes is None:
+      map_bytes = await build_pool.run(build_map_content, body, encoding)
+      await worker_pool.run_io(build_cache.put, key, map_bytes)
+  except ValidationError as e:
+    raise RequestValidationError(e.errors())
+  except MapBodyError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  except WorkerBusyError as e:
+    raise HTTPException(status_code=503, detail=str(e))
+  except Exception as e:
+    build_logger.critical(f"Building map was failed, because of {e}.")
+    body_path = await worker_pool.run_io(dump_failed_body, body, encoding)
+    build_logger.info(f"Map structure saved in {body_path}")
+
+    status_code = 504 if isinstance(e, BuildTimeoutError) else 500
+    raise HTTPException(status_code=status_code, detail=str(e))
+
+  build_logger.info("Building was succesful.")
+  return scx_response(map_bytes)
+
+
+@router.post("/build/jobs", status_code=202)
+async def submit_build_job(request: Request) -> BuildJob:
+  """
+  Start building `Usemap` body in background, same as `/build` takes it.
+
+  Poll `/build/jobs/{job_id}` until its status is `done` or `failed`, then download the map from
+  `/build/jobs/{job_id}/artifact`. Body which was built before is `done` at once.
+  """
+  body = await request.body()
+  encoding = content_encoding(request.headers.get("content-type"))
+
+  try:
+    return await build_jobs.submit(body, encoding)
+  except WorkerBusyError as e:
+    raise HTTPException(status_code=503, detail=str(e))
+
+
+def get_job(job_id: str) -> BuildJob:
+  job = build_jobs.get(job_id)
+  if job is None:
+    raise HTTPException(status_code=404, detail=f"Unknown build job {job_id}")
+
+  return job
+
+
+@router.get("/build/jobs/{job_id}")
+async def get_build_job(job_id: str) -> BuildJob:
+  return get_job(job_id)
+
+
+@router.get("/build/jobs/{job_id}/artifact")
+async def get_build_artifact(job_id: str):
+  job = get_job(job_id)
+  if job.status != "done":
+    raise HTTPException(status_code=409, detail=f"Build job {job_id} is {job.status}.")
+
+  map_bytes = await build_jobs.artifact(job)
+  if map_bytes is None:
+    raise HTTPException(
+      status_code=410, detail=f"Built map of {job_id} was evicted, build again."
+    )
+
+  return scx_response(map_bytes)
@@ -0,0 +1,46 @@
+"""
+Runtime settings read from environment variables.
+"""
+
+import os
+
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+"""Upper bound of compressed parsed maps kept in memory."""
+
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR") or None
+"""Directory of on-disk parse cache tier. Disabled when not set."""
+
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(min(4, os.cpu_count() or 1))))
+"""Number of processes parsing and converting maps."""
+
+IO_THREADS = int(os.getenv("IO_THREADS", "8"))
+"""Number of threads running blocking storage calls."""
+
+WORKER_MAX_PENDING = int(os.getenv("WORKER_MAX_PENDING", str(WORKER_PROCESSES * 2)))
+"""Maximum parsing jobs running or waiting at once. Further jobs are rejected."""
+
+BUILD_OUTPUT_DIR = os.getenv("BUILD_OUTPUT_DIR") or (
+  "/dev/shm" if os.path.isdir("/dev/shm") else None
+)
+"""Directory built maps are saved to and read back from. tmpfs by default, so builds skip disk."""
+
+BUILD_PROCESSES = int(os.getenv("BUILD_PROCESSES", str(min(2, os.cpu_count() or 1))))
+"""Number of processes building maps by eudplib."""
+
+BUILD_MAX_PENDING = int(os.getenv("BUILD_MAX_PENDING", str(BUILD_PROCESSES * 2)))
+"""Maximum builds running or waiting at once. Further builds are rejected."""
+
+BUILD_TIMEOUT = float(os.getenv("BUILD_TIMEOUT", "300"))
+"""Seconds a build may run before its worker process is killed."""
+
+BUILD_MAX_JOBS_PER_WORKER = int(os.getenv("BUILD_MAX_JOBS_PER_WORKER", "50"))
+"""Builds run by a worker process before it is replaced by a fresh one."""
+
+BUILD_CACHE_MAX_BYTES = int(os.getenv("BUILD_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+"""Upper bound of compressed built maps kept in memory."""
+
+BUILD_CACHE_DIR = os.getenv("BUILD_CACHE_DIR") or None
+"""Directory of on-disk build cache tier. Disabled when not set."""
+
+BUILD_JOBS_MAX = int(os.getenv("BUILD_JOBS_MAX", "1024"))
+"""Number of finished build jobs remembered for polling."""
@@ -1,17 +1,34 @@
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.endpoints import map, user 
 from app.core.w_logging import get_logger, setup_logging
+from app.services.io import get_definitions_json
+from app.services.workers import build_pool, worker_pool
 from fastapi.responses import JSONResponse
 from firebase_admin import auth as firebase_auth
 from firebase_admin._auth_utils import InvalidIdTokenError
 
 setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  worker_pool.start()
+  await asyncio.gather(
+    worker_pool.run_io(get_definitions_json), worker_pool.run_io(build_pool.start)
+  )
+  yield
+  build_pool.shutdown()
+  worker_pool.shutdown()
+
+
 app = FastAPI(
   title="Webditor API",
   description="A FastAPI backend for the Webditor project",
   version="1.0.0",
+  lifespan=lifespan,
 )
 
 app.add_middleware(
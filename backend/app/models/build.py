@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+BuildStatus = Literal[
+  "queued", "decoding", "transforming", "serializing", "saving", "done", "failed"
+]
+
+
+class BuildJob(BaseModel):
+  """Map build running on build workers, polled by its `id` until it is done or failed."""
+
+  id: str
+  hash: str
+  """Content hash of the built `Usemap` body. Same body is built only once."""
+  status: BuildStatus = "queued"
+  error: Optional[str] = None
@@ -1,3 +1,5 @@
+from typing import Optional
+from pydantic import model_validator
 from .entity import Entity, EntityKind
 from ..definitions.sprite import SpriteDefinition
 from ..player import Player
@@ -9,4 +11,16 @@ class Sprite(Entity):
   kind: EntityKind = "Sprite"
   owner: Player
   flags: int
-  definition: SpriteDefinition
+  definition: Optional[SpriteDefinition] = None
+  """Embedded definition. `None` in normalized `Usemap`, see `definition_id`."""
+  definition_id: Optional[int] = None
+  """Id of `SpriteDefinition` in `Usemap.assets`. Follows `definition` when it's embedded."""
+
+  @model_validator(mode="after")
+  def check_definition(self) -> "Sprite":
+    if self.definition is not None:
+      self.definition_id = self.definition.id
+    elif self.definition_id is None:
+      raise ValueError("Sprite requires either definition or definition_id.")
+
+    return self
@@ -1,6 +1,6 @@
 from typing import Optional
 from app.models.definitions.unit import UnitDefinition
-from pydantic import Field
+from pydantic import Field, model_validator
 from ..player import Player
 from .entity import Entity, EntityKind
 from ..wobject import WObject
@@ -18,7 +18,10 @@ class Unit(Entity):
   serial_number: Optional[int] = None
   """Identical number when unit placed on map. -1 When non-placed unit."""
   use_default: bool = True
-  unit_definition: UnitDefinition
+  unit_definition: Optional[UnitDefinition] = None
+  """Embedded definition. `None` in normalized `Usemap`, see `definition_id`."""
+  definition_id: Optional[int] = None
+  """Id of `UnitDefinition` in `Usemap.assets`. Follows `unit_definition` when it's embedded."""
 
   owner: Player = Player(
     player_type="Inactive", race="Inactive", color=0, rgb_color=(0, 0, 0)
@@ -31,6 +34,15 @@ class Unit(Entity):
   special_properties: int = 0
   valid_properties: int = 0
 
+  @model_validator(mode="after")
+  def check_definition(self) -> "Unit":
+    if self.unit_definition is not None:
+      self.definition_id = self.unit_definition.id
+    elif self.definition_id is None:
+      raise ValueError("Unit requires either unit_definition or definition_id.")
+
+    return self
+
 
 class PlacedUnitRelationFlag(Flag):
   nydus_link = 0b10000000
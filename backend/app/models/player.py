@@ -1,5 +1,5 @@
 from enum import Flag
-from pydantic import Field
+from pydantic import BaseModel, Field
 from .wobject import WObject
 from app.types.race import PlayerType, Race
 
@@ -12,6 +12,13 @@ class Player(WObject):
   force: int = Field(default=0, lt=4, ge=0)
 
 
+class PlayerSlot(BaseModel):
+  id: int
+  player_type: PlayerType
+  race: Race
+  unit_count: int
+
+
 class ForcePropertyFlag(Flag):
   random_start_location = 0b00000001
   allies = 0b00000010
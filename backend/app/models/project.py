@@ -1,7 +1,7 @@
 from typing import Union
 from app.models.asset import Asset
-from pydantic import BaseModel
-from .player import Force, Player
+from pydantic import BaseModel, ConfigDict
+from .player import Force, Player, PlayerSlot
 from .string import String
 from .entities.unit import UnitProperty
 from .validation import Validation
@@ -51,11 +51,45 @@ AssetType = Union[
 ]
 
 
+class UsemapOptions(BaseModel):
+  """Options changing how map is converted into `Usemap`."""
+
+  model_config = ConfigDict(frozen=True)
+
+  normalized: bool = False
+  """Entities refer definitions in `assets` by `definition_id` instead of embedding them."""
+  inline_definitions: bool = True
+  """Include DAT-only definitions in `assets`. When disabled, get them once by `/definitions`."""
+  raster: bool = False
+  """Store tiles and mask as `RawTerrain` rasters instead of one entity per cell."""
+
+  def cache_key(self) -> str:
+    return self.model_dump_json()
+
+
 class ScenarioProperty(BaseModel):
   name: String
   description: String
 
 
+class DefaultDefinitions(BaseModel):
+  """DAT-only definitions, identical for every map."""
+
+  flingy: list[FlingyDefinition]
+  sprite: list[SpriteDefinition]
+  image: list[ImageDefinition]
+  order: list[OrderDefinition]
+  portrait: list[PortraitDefinition]
+
+
+class MapSummary(BaseModel):
+  """Lightweight map overview for project lists and map cards."""
+
+  terrain: RawTerrain
+  scenario_property: ScenarioProperty
+  players: list[PlayerSlot]
+
+
 class Usemap(BaseModel):
   terrain: RawTerrain
   player: list[Player]
@@ -1,8 +1,30 @@
+from typing import Literal, Optional
 from app.types.tileset import Tileset
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+from app.services.hex_validator import Base64Bytes
 from .structs.spatial import Size
 
 
+class RasterLayer(BaseModel):
+  """Typed 2-dimensional layer, packed as little-endian row-major bytes(base64 in JSON)."""
+
+  dtype: Literal["uint8", "uint16"]
+  width: int
+  height: int
+  data: Base64Bytes
+
+  @model_validator(mode="after")
+  def check_size(self) -> "RasterLayer":
+    itemsize = 2 if self.dtype == "uint16" else 1
+    if len(self.data) != self.width * self.height * itemsize:
+      raise ValueError(
+        f"{self.dtype} raster of {self.width}x{self.height} must be "
+        f"{self.width * self.height * itemsize} bytes, got {len(self.data)}."
+      )
+
+    return self
+
+
 class RawTerrain(BaseModel):
   """Raw terrain model.
 
@@ -12,3 +34,7 @@ class RawTerrain(BaseModel):
 
   size: Size
   tileset: Tileset
+  tiles: Optional[RasterLayer] = None
+  """MTXM as `uint16` raster. Replaces `Tile` entities when set."""
+  mask: Optional[RasterLayer] = None
+  """MASK as `uint8` raster. Replaces `Mask` entities when set."""
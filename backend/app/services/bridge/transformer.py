@@ -15,6 +15,7 @@ from eudplib import (
 )
 from eudplib.trigtrg.runtrigtrg import RunTrigTrigger
 from app.models.project import Usemap
+from app.services.definition_index import DefinitionIndex
 from typing import Callable
 from wengine.main import main_loop
 
@@ -25,6 +26,7 @@ class Transformer:
   def __init__(self, map: Usemap):
     self.map = map
     self.logger = get_logger("transformer")
+    self.definitions = DefinitionIndex(map)
 
   def transform(self) -> Callable:
     @EUDFunc
@@ -87,14 +89,15 @@ class Transformer:
 
     id_without_start_location = 0
     for rawunit in placed_units:
-      if rawunit.id is not None and rawunit.unit_definition.id != 214:
+      unit_definition = self.definitions.unit(rawunit)
+      if rawunit.id is not None and unit_definition.id != 214:
         unit = Unit.alloc(id_without_start_location)
         id_without_start_location += 1
         cunit = CUnit.from_ptr(unit.ptr)
-        cunit.unitID = rawunit.unit_definition.id
+        cunit.unitID = unit_definition.id
         self.logger.info(f"Allocating unit {rawunit.id}: {rawunit.name}")
         self.logger.info(
-          f"Unit definition id: {rawunit.unit_definition.id}, serial_number: {rawunit.serial_number}"
+          f"Unit definition id: {unit_definition.id}, serial_number: {rawunit.serial_number}"
         )
 
         # unit.on_burrow = EUDFuncPtr(1, 0)(on_burrow)
@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, Optional
+from app.core.config import (
+  BUILD_CACHE_DIR,
+  BUILD_CACHE_MAX_BYTES,
+  PARSE_CACHE_DIR,
+  PARSE_CACHE_MAX_BYTES,
+)
+from app.core.w_logging import get_logger
+import hashlib
+import os
+import threading
+import zlib
+
+PARSE_CACHE_VERSION = b"3"
+"""Bumped whenever parsed map output changes, so stale disk entries are never served."""
+
+BUILD_CACHE_VERSION = b"1"
+"""Bumped whenever built map output changes(`CHKBuilder`, eudplib or the template map)."""
+
+CHUNK_SIZE = 1 << 16
+
+
+def compress(chunks: Iterable[bytes]) -> bytes:
+  """zlib-compress chunks as they come, without joining them first."""
+  compressor = zlib.compressobj(6)
+  compressed = [compressor.compress(chunk) for chunk in chunks]
+  compressed.append(compressor.flush())
+
+  return b"".join(compressed)
+
+
+def iter_decompress(compressed: bytes, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+  """Decompress zlib stream into chunks of at most `chunk_size` bytes."""
+  decompressor = zlib.decompressobj()
+  data = compressed
+  while data:
+    chunk = decompressor.decompress(data, chunk_size)
+    if chunk:
+      yield chunk
+    data = decompressor.unconsumed_tail
+
+  tail = decompressor.flush()
+  if tail:
+    yield tail
+
+
+class ParseCache:
+  """
+  Content-addressed cache of parsed maps.
+
+  Entries are keyed by the sha256 of uploaded map bytes and hold zlib-compressed serialized
+  `Usemap`(JSON or MessagePack). Serialized map is kept instead of `Usemap` itself since
+  validating a big map back into `Usemap` costs more than parsing it again, so hits are served
+  as they are.
+
+  Memory tier is a LRU bounded by total compressed bytes. When `directory` is set, every entry is
+  also written there and memory misses fall back to it.
+
+  Built SCX maps are kept in a separate instance, `build_cache`, keyed by their request body.
+  `version` salts every key and `name` tells instances apart in logs.
+  """
+
+  def __init__(
+    self,
+    max_bytes: int,
+    directory: Optional[str] = None,
+    version: bytes = PARSE_CACHE_VERSION,
+    name: str = "Parse",
+  ):
+    self.logger = get_logger("cache")
+    self.max_bytes = max_bytes
+    self.directory = directory
+    self.version = version
+    self.name = name
+    self.entries: OrderedDict[str, bytes] = OrderedDict()
+    self.size = 0
+    self.lock = threading.Lock()
+
+    if self.directory:
+      os.makedirs(self.directory, exist_ok=True)
+
+  def key(self, content: bytes, *options: str) -> str:
+    """Cache key of map bytes. `options` are for parse options which change output."""
+    digest = hashlib.sha256(self.version)
+    for option in options:
+      digest.update(b"\x00" + option.encode())
+    digest.update(b"\x00" + content)
+
+    return digest.hexdigest()
+
+  def path(self, key: str) -> str:
+    assert self.directory is not None
+    return os.path.join(self.directory, key[:2], f"{key}.z")
+
+  def get(self, key: str) -> Optional[bytes]:
+    """Get serialized `Usemap`, or `None` when it isn't cached."""
+    compressed = self.get_compressed(key)
+    return None if compressed is None else zlib.decompress(compressed)
+
+  def get_compressed(self, key: str) -> Optional[bytes]:
+    """Get zlib-compressed serialized `Usemap`, for streaming it with `iter_decompress`."""
+    with self.lock:
+      compressed = self.entries.get(key)
+      if compressed is not None:
+        self.entries.move_to_end(key)
+
+    if compressed is None and self.directory:
+      try:
+        with open(self.path(key), "rb") as f:
+          compressed = f.read()
+      except FileNotFoundError:
+        return None
+
+      self._remember(key, compressed)
+
+    if compressed is None:
+      return None
+
+    self.logger.debug(f"{self.name} cache hit: {key}")
+    return compressed
+
+  def put(self, key: str, serialized: bytes):
+    self.put_compressed(key, zlib.compress(serialized, 6))
+
+  def put_compressed(self, key: str, compressed: bytes):
+    self._remember(key, compressed)
+
+    if self.directory:
+      path = self.path(key)
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+      with open(tmp_path, "wb") as f:
+        f.write(compressed)
+      os.replace(tmp_path, path)
+
+  def get_or_parse(self, key: str, parse: Callable[[], bytes]) -> bytes:
+    """Get cached map, or run `parse` and cache what it returns."""
+    cached = self.get(key)
+    if cached is not None:
+      return cached
+
+    self.logger.debug(f"{self.name} cache miss: {key}")
+    serialized = parse()
+    self.put(key, serialized)
+    return serialized
+
+  def _remember(self, key: str, compressed: bytes):
+    if len(compressed) > self.max_bytes:
+      return
+
+    with self.lock:
+      previous = self.entries.pop(key, None)
+      if previous is not None:
+        self.size -= len(previous)
+
+      self.entries[key] = compressed
+      self.size += len(compressed)
+
+      while self.size > self.max_bytes:
+        _, evicted = self.entries.popitem(last=False)
+        self.size -= len(evicted)
+
+
+parse_cache = ParseCache(PARSE_CACHE_MAX_BYTES, PARSE_CACHE_DIR)
+build_cache = ParseCache(
+  BUILD_CACHE_MAX_BYTES, BUILD_CACHE_DIR, BUILD_CACHE_VERSION, "Build"
+)
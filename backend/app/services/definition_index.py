@@ -0,0 +1,60 @@
+from app.models.definitions.sprite import SpriteDefinition
+from app.models.definitions.unit import UnitDefinition
+from app.models.entities.sprite import Sprite
+from app.models.entities.unit import Unit
+from app.models.project import Usemap
+from app.services.rawdata.partition import TypePartition
+from typing import Optional
+
+
+class DefinitionIndex:
+  """
+  Id index of definitions in `Usemap.assets`.
+
+  Resolves definitions of entities in both embedded and normalized `Usemap`, so callers don't
+  have to care which one they got. Embedded definition always wins over `definition_id`.
+
+  DAT-only definitions(e.g. sprites) are left out of `assets` when map was opened without
+  `inline_definitions`, those fall back to `get_default_definitions()`.
+  """
+
+  def __init__(self, map: Usemap, assets: Optional[TypePartition] = None):
+    if assets is None:
+      assets = TypePartition(map.assets)
+    self.units: dict[int, UnitDefinition] = {}
+    self.sprites: dict[int, SpriteDefinition] = {}
+
+    for unit in assets.of(UnitDefinition):
+      self.units.setdefault(unit.id, unit)
+    for sprite in assets.of(SpriteDefinition):
+      self.sprites.setdefault(sprite.id, sprite)
+
+  def unit(self, unit: Unit) -> UnitDefinition:
+    if unit.unit_definition is not None:
+      return unit.unit_definition
+
+    assert unit.definition_id is not None
+    try:
+      return self.units[unit.definition_id]
+    except KeyError:
+      raise KeyError(
+        f"Unit {unit.id} refers unknown unit definition {unit.definition_id}."
+      )
+
+  def sprite(self, sprite: Sprite) -> SpriteDefinition:
+    if sprite.definition is not None:
+      return sprite.definition
+
+    assert sprite.definition_id is not None
+    if sprite.definition_id in self.sprites:
+      return self.sprites[sprite.definition_id]
+
+    from app.services.io import get_default_definitions
+
+    defaults = get_default_definitions().sprite
+    if not 0 <= sprite.definition_id < len(defaults):
+      raise KeyError(
+        f"Sprite {sprite.id} refers unknown sprite definition {sprite.definition_id}."
+      )
+
+    return defaults[sprite.definition_id]
@@ -0,0 +1,182 @@
+"""
+Content negotiation between JSON and MessagePack.
+
+JSON stays default. With MessagePack, raw bytes fields(`HexBytes`, `Base64Bytes`) are kept as
+msgpack bin instead of hex/base64 strings, and integers are packed into their smallest msgpack
+form. Models are dumped by pydantic in python mode, so `model_dump(mode="json")` is never used.
+"""
+
+from typing import Any, Iterator, Literal, Optional, TypeVar
+from pydantic import BaseModel, TypeAdapter
+import functools
+import json
+import msgpack
+
+Encoding = Literal["json", "msgpack"]
+
+MEDIA_TYPES: dict[Encoding, str] = {
+  "json": "application/json",
+  "msgpack": "application/msgpack",
+}
+MSGPACK_MEDIA_TYPES = (
+  "application/msgpack",
+  "application/x-msgpack",
+  "application/vnd.msgpack",
+)
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def media_ranges(accept: str) -> Iterator[tuple[str, float]]:
+  """Media ranges of `Accept` header with their q-values, skipping ones with malformed q."""
+  for media_range in accept.split(","):
+    media_type, *params = (part.strip() for part in media_range.split(";"))
+    q = 1.0
+    try:
+      for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+          q = float(value)
+    except ValueError:
+      continue
+
+    if media_type:
+      yield media_type.lower(), q
+
+
+def quality(ranges: list[tuple[str, float]], media_types: tuple[str, ...]) -> float:
+  """q-value of the most specific range matching any of `media_types`, 0 when none does."""
+  best = (-1, 0.0)
+  for media_type, q in ranges:
+    if media_type in media_types:
+      specificity = 2
+    elif media_type == media_types[0].split("/")[0] + "/*":
+      specificity = 1
+    elif media_type == "*/*":
+      specificity = 0
+    else:
+      continue
+
+    best = max(best, (specificity, q))
+
+  return best[1]
+
+
+def negotiate(accept: Optional[str]) -> Encoding:
+  """
+  Pick response encoding from `Accept` header. MessagePack is picked only when it's weighted
+  higher than JSON, so JSON wins ties, wildcards and headers accepting neither.
+  """
+  if not accept:
+    return "json"
+
+  ranges = list(media_ranges(accept))
+  if quality(ranges, MSGPACK_MEDIA_TYPES) > quality(ranges, (MEDIA_TYPES["json"],)):
+    return "msgpack"
+
+  return "json"
+
+
+def content_encoding(content_type: Optional[str]) -> Encoding:
+  """Pick request body encoding from `Content-Type` header."""
+  media_type = (content_type or "").split(";")[0].strip().lower()
+  return "msgpack" if media_type in MSGPACK_MEDIA_TYPES else "json"
+
+
+def encode(model: BaseModel, encoding: Encoding) -> bytes:
+  if encoding == "msgpack":
+    return msgpack.packb(model.model_dump(), use_bin_type=True)
+
+  return model.model_dump_json().encode()
+
+
+def decode(body: bytes, model: type[M], encoding: Encoding) -> M:
+  if encoding == "msgpack":
+    return model.model_validate(msgpack.unpackb(body, raw=False))
+
+  return model.model_validate_json(body)
+
+
+STREAM_BATCH_SIZE = 512
+"""Number of list items serialized at once by `iter_encode`."""
+
+
+@functools.cache
+def field_adapter(annotation: Any) -> TypeAdapter:
+  return TypeAdapter(annotation)
+
+
+def iter_encode(
+  model: BaseModel, encoding: Encoding, stream: tuple[str, ...] = ("entities", "assets")
+) -> Iterator[bytes]:
+  """
+  Serialize `model` incrementally, producing same bytes as `encode`.
+
+  Every top-level field is serialized on its own, and lists named in `stream` are serialized
+  `STREAM_BATCH_SIZE` items at a time, so whole serialized tree never exists at once.
+  """
+  fields = type(model).model_fields
+  packer = msgpack.Packer(use_bin_type=True)
+
+  if encoding == "msgpack":
+    yield packer.pack_map_header(len(fields))
+  else:
+    yield b"{"
+
+  for index, (name, field) in enumerate(fields.items()):
+    value = getattr(model, name)
+    adapter = field_adapter(field.annotation)
+
+    if encoding == "msgpack":
+      yield packer.pack(name)
+    else:
+      yield (b"," if index else b"") + json.dumps(name).encode() + b":"
+
+    if name not in stream or not isinstance(value, list):
+      if encoding == "msgpack":
+        yield packer.pack(adapter.dump_python(value))
+      else:
+        yield adapter.dump_json(value)
+      continue
+
+    if encoding == "msgpack":
+      yield packer.pack_array_header(len(value))
+    else:
+      yield b"["
+
+    for start in range(0, len(value), STREAM_BATCH_SIZE):
+      batch = value[start : start + STREAM_BATCH_SIZE]
+      if encoding == "msgpack":
+        yield b"".join(packer.pack(item) for item in adapter.dump_python(batch))
+      else:
+        yield (b"," if start else b"") + adapter.dump_json(batch)[1:-1]
+
+    if encoding == "json":
+      yield b"]"
+
+  if encoding == "json":
+    yield b"}"
+
+
+def envelope_parts(encoding: Encoding, key: str, **fields) -> tuple[bytes, bytes]:
+  """Bytes written before and after encoded value of `envelope`, for streaming it."""
+  if encoding == "msgpack":
+    packer = msgpack.Packer(use_bin_type=True)
+    parts = [packer.pack_map_header(len(fields) + 1)]
+    for name, value in fields.items():
+      parts += [packer.pack(name), packer.pack(value)]
+    parts.append(packer.pack(key))
+
+    return b"".join(parts), b""
+
+  head = json.dumps(fields).encode()[:-1]
+  separator = b", " if fields else b""
+  return b"".join((head, separator, json.dumps(key).encode(), b": ")), b"}"
+
+
+def envelope(encoding: Encoding, key: str, encoded: bytes, **fields) -> bytes:
+  """
+  Wrap already encoded value into `{**fields, key: value}` without decoding it again.
+  """
+  head, tail = envelope_parts(encoding, key, **fields)
+  return b"".join((head, encoded, tail))
@@ -1,3 +1,4 @@
+import base64
 from pydantic import PlainValidator, PlainSerializer, errors, WithJsonSchema
 from typing import Any
 from typing_extensions import Annotated
@@ -6,7 +7,7 @@ from typing_extensions import Annotated
 def hex_bytes_validator(o: Any) -> bytes:
   if isinstance(o, bytes):
     return o
-  elif isinstance(o, bytearray):
+  elif isinstance(o, (bytearray, memoryview)):
     return bytes(o)
   elif isinstance(o, str):
     return bytes.fromhex(o)
@@ -16,6 +17,25 @@ def hex_bytes_validator(o: Any) -> bytes:
 HexBytes = Annotated[
   bytes,
   PlainValidator(hex_bytes_validator),
-  PlainSerializer(lambda b: b.hex()),
+  PlainSerializer(lambda b: b.hex(), when_used="json"),
   WithJsonSchema({"type": "string"}),
 ]
+
+
+def base64_bytes_validator(o: Any) -> bytes:
+  if isinstance(o, bytes):
+    return o
+  elif isinstance(o, (bytearray, memoryview)):
+    return bytes(o)
+  elif isinstance(o, str):
+    return base64.b64decode(o, validate=True)
+  raise errors.BytesError()
+
+
+Base64Bytes = Annotated[
+  bytes,
+  PlainValidator(base64_bytes_validator),
+  PlainSerializer(lambda b: base64.b64encode(b).decode(), when_used="json"),
+  WithJsonSchema({"type": "string", "contentEncoding": "base64"}),
+]
+"""Raw bytes in Python, base64 string in JSON."""
@@ -1,20 +1,26 @@
 import os
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from app.models.asset import Asset
-from app.services.rawdata.converter import MapConverter
+from app.services.rawdata.converter import MapConverter, get_dat_converter
 from eudplib import CompressPayload
 from eudplib.core.mapdata import chktok, mapdata
 from eudplib.maprw.savemap import SaveMap
-from eudplib.maprw.loadmap import LoadMap
+from eudplib.maprw.mpqadd import update_filelist_by_listfile
 from eudplib.bindings._rust import mpqapi
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, mkstemp
 from io import BytesIO
+from typing import Iterator, Optional
+from app.core.config import BUILD_OUTPUT_DIR
 from app.services.rawdata.chk import CHK, CHKBuilder
-from app.services.rawdata.dat import DAT
-from app.models.project import Usemap
+from app.services.rawdata.dat import DAT, get_dat
+from app.models.project import DefaultDefinitions, MapSummary, Usemap, UsemapOptions
 from app.services.bridge.transformer import Transformer
+from app.services.encoding import Encoding, decode, iter_encode
+from app.services.workers import report_progress
 from itertools import count
-import uuid
+import functools
+import hashlib
+import msgpack
 
 
 def create_items(items: list | dict) -> list[Asset]:
@@ -52,6 +58,23 @@ def create_items(items: list | dict) -> list[Asset]:
 
 
 def get_assets(converter: MapConverter) -> list[Asset]:
+  if converter.options.inline_definitions:
+    definitions = {
+      "Flingy": converter.flingy_definitions,
+      "Sprite": converter.sprite_definitions,
+      "Image": converter.image_definitions,
+      "Weapon": converter.weapon_definitions,
+      "Unit": converter.unit_definitions,
+      "Order": converter.orders,
+      "Portrait": converter.portraits,
+    }
+  else:
+    # DAT-only definitions are served by `/definitions` instead.
+    definitions = {
+      "Weapon": converter.weapon_definitions,
+      "Unit": converter.unit_definitions,
+    }
+
   return create_items(
     {
       "Tech": converter.tech,
@@ -61,15 +84,7 @@ def get_assets(converter: MapConverter) -> list[Asset]:
         "Tech": converter.tech_restrictions,
         "Unit": converter.unit_restrictions,
       },
-      "Definitions": {
-        "Flingy": converter.flingy_definitions,
-        "Sprite": converter.sprite_definitions,
-        "Image": converter.image_definitions,
-        "Weapon": converter.weapon_definitions,
-        "Unit": converter.unit_definitions,
-        "Order": converter.orders,
-        "Portrait": converter.portraits,
-      },
+      "Definitions": definitions,
       "Entities": {
         "Unit": converter.default_unit_entities,
         "Sprite": converter.default_sprite_entities,
@@ -79,6 +94,16 @@ def get_assets(converter: MapConverter) -> list[Asset]:
 
 
 def get_entities(converter: MapConverter) -> list[Asset]:
+  if converter.options.raster:
+    # Tiles and mask are stored in `RawTerrain` rasters instead.
+    return create_items(
+      {
+        "Location": converter.locations,
+        "Sprite": converter.placed_sprites,
+        "Unit": converter.placed_units,
+      },
+    )
+
   return create_items(
     {
       "Tile": converter.tiles,
@@ -90,27 +115,34 @@ def get_entities(converter: MapConverter) -> list[Asset]:
   )
 
 
-def get_chkt(file: BytesIO) -> chktok.CHK:
-  """
-  Get chkt class.
+SCENARIO_CHK = "staredit\\scenario.chk"
+
+
+def extract_scenario_chk_memfd(content: bytes) -> bytes:
+  """Extract scenario.chk through anonymous in-memory file, opened by `/proc/self/fd` path."""
+  fd = os.memfd_create("scenario.scx")
+  try:
+    with os.fdopen(fd, "wb", closefd=False) as memfile:
+      memfile.write(content)
+
+    mpqr = mpqapi.MPQ.open(f"/proc/self/fd/{fd}")
+    try:
+      return mpqr.extract_file(SCENARIO_CHK)
+    finally:
+      del mpqr  # Release MPQ handle before memfd is closed
+  finally:
+    os.close(fd)
 
-  Since stormlib after 0.9.0 can get data from http by using prefix, it limited on Windows. So
-  tempfile has used.
-  """
-  content = file.read()
 
+def extract_scenario_chk_tempfile(content: bytes) -> bytes:
+  """Extract scenario.chk through temporary file on disk."""
   with NamedTemporaryFile(delete=False, suffix=".scx") as tmp:
     tmp.write(content)
     tmp_path = tmp.name
 
   try:
     mpqr = mpqapi.MPQ.open(tmp_path)
-    scenario_chk_bytes = mpqr.extract_file("staredit\\scenario.chk")
-
-    chkt = chktok.CHK()
-    chkt.loadchk(scenario_chk_bytes)
-
-    return chkt
+    return mpqr.extract_file(SCENARIO_CHK)
   finally:
     try:
       del mpqr  # Ensure MPQ object is released
@@ -122,66 +154,273 @@ def get_chkt(file: BytesIO) -> chktok.CHK:
       pass
 
 
-def get_map(chk: CHK, dat: DAT):
-  """ """
-  converter = MapConverter(dat, chk)
-
-  map: Usemap = Usemap(
-    terrain=converter.terrain,
-    player=converter.players,
-    string=converter.strings,
-    validation=converter.validation,
-    unit_properties=converter.unit_properties,
-    raw_triggers=converter.triggers,
-    raw_mbrf_triggers=converter.mbrf_triggers,
-    force=converter.forces,
-    scenario_property=converter.scenario_property,
-    entities=get_entities(converter),
-    assets=get_assets(converter),
+_memfd_usable = hasattr(os, "memfd_create") and os.path.isdir("/proc/self/fd")
+"""Whether scenario.chk is extracted through memfd. Turned off for this process once it fails."""
+
+
+def get_scenario_chk(file: BytesIO) -> bytes:
+  """
+  Extract raw scenario.chk bytes from map file.
+
+  mpqapi only opens MPQ by path. On Linux, map is written to memfd so extraction does no disk
+  I/O. Since stormlib after 0.9.0 can get data from http by using prefix, it limited on Windows,
+  so there(or when memfd isn't usable) tempfile has used.
+  """
+  global _memfd_usable
+  content = file.read()
+
+  if _memfd_usable:
+    try:
+      return extract_scenario_chk_memfd(content)
+    except Exception:
+      # mpqapi doesn't specify what it raises. Broken maps fail on tempfile too, so memfd is
+      # turned off only when tempfile extracts what memfd couldn't.
+      scenario_chk = extract_scenario_chk_tempfile(content)
+      _memfd_usable = False
+      return scenario_chk
+
+  return extract_scenario_chk_tempfile(content)
+
+
+def get_chkt(file: BytesIO) -> chktok.CHK:
+  """
+  Get chkt class.
+  """
+  chkt = chktok.CHK()
+  chkt.loadchk(get_scenario_chk(file))
+
+  return chkt
+
+
+def get_chk(file: BytesIO) -> CHK:
+  """
+  Get `CHK` indexed directly over the extracted scenario.chk buffer.
+
+  Unlike `get_chkt`, sections aren't tokenized into separated bytes, so they are not copied.
+  """
+  return CHK(raw=get_scenario_chk(file))
+
+
+def get_map(
+  chk: CHK, dat: DAT, options: Optional[UsemapOptions] = None, trusted: bool = True
+) -> Usemap:
+  """
+  Convert CHK into `Usemap`.
+
+  Models are already validated by `MapConverter` while being created. When `trusted`, they are
+  put into `Usemap` without checking every entity and asset again.
+  """
+  from app.services.utils.memory import paused_gc
+
+  with paused_gc():
+    converter = MapConverter(dat, chk, options)
+
+    fields = {
+      "terrain": converter.terrain,
+      "player": converter.players,
+      "string": converter.strings,
+      "validation": converter.validation,
+      "unit_properties": converter.unit_properties,
+      "raw_triggers": converter.triggers,
+      "raw_mbrf_triggers": converter.mbrf_triggers,
+      "force": converter.forces,
+      "scenario_property": converter.scenario_property,
+      "entities": get_entities(converter),
+      "assets": get_assets(converter),
+    }
+
+    return Usemap.model_construct(**fields) if trusted else Usemap(**fields)
+
+
+@functools.cache
+def get_default_definitions() -> DefaultDefinitions:
+  """DAT-only definitions. Converted once per process, since they never change at runtime."""
+  converter = get_dat_converter()
+
+  return DefaultDefinitions(
+    flingy=converter.flingy_definitions,
+    sprite=converter.sprite_definitions,
+    image=converter.image_definitions,
+    order=converter.orders,
+    portrait=converter.portraits,
+  )
+
+
+@functools.cache
+def get_definitions_json() -> tuple[bytes, str]:
+  """Serialized `get_default_definitions()` and its strong ETag."""
+  serialized = get_default_definitions().model_dump_json().encode()
+  etag = f'"{hashlib.sha256(serialized).hexdigest()}"'
+
+  return serialized, etag
+
+
+def serialize_map_compressed(
+  content: bytes, options: Optional[UsemapOptions] = None, encoding: Encoding = "json"
+) -> bytes:
+  """
+  Parse map bytes into serialized `Usemap`, zlib-compressed while being streamed out of
+  `iter_encode`. Runs on worker processes.
+
+  Whole serialized map is never held uncompressed, and less bytes are sent back from worker
+  processes.
+  """
+  from app.services.cache import compress
+
+  return compress(
+    iter_encode(get_map(get_chk(BytesIO(content)), get_dat(), options), encoding)
+  )
+
+
+async def load_serialized_map(
+  content: bytes, options: Optional[UsemapOptions] = None, encoding: Encoding = "json"
+) -> Iterator[bytes]:
+  """
+  Get serialized `Usemap` of uploaded map bytes, parsing cache misses on worker processes.
+
+  Parsed maps are cached by content hash, options and encoding, so byte-identical maps are
+  parsed only once.
+
+  Serialized map stays compressed until it's iterated, so responses can be streamed chunk by
+  chunk.
+
+  Raises:
+      WorkerBusyError: When too many maps are already being parsed.
+  """
+  from app.services.cache import iter_decompress, parse_cache
+  from app.services.workers import worker_pool
+
+  options = options or UsemapOptions()
+  key = await worker_pool.run_io(
+    parse_cache.key, content, options.cache_key(), encoding
+  )
+  compressed = await worker_pool.run_io(parse_cache.get_compressed, key)
+  if compressed is None:
+    compressed = await worker_pool.run_cpu(
+      serialize_map_compressed, content, options, encoding
+    )
+    await worker_pool.run_io(parse_cache.put_compressed, key, compressed)
+
+  return iter_decompress(compressed)
+
+
+def get_map_summary(chk: CHK) -> MapSummary:
+  """
+  Get map overview without running whole `get_map` pipeline.
+
+  Only sections needed by `CHK.summary` are decoded and DAT isn't touched at all, so it's cheap
+  enough for listing projects.
+  """
+  from app.models.player import PlayerSlot
+  from app.models.project import ScenarioProperty
+  from app.models.string import String
+  from app.models.structs.spatial import Size
+  from app.models.terrain import RawTerrain
+
+  summary = chk.summary
+  name = summary.scenario_property.name
+  description = summary.scenario_property.description
+
+  return MapSummary(
+    terrain=RawTerrain(
+      size=Size(width=summary.terrain.size.width, height=summary.terrain.size.height),
+      tileset=summary.terrain.tileset,
+    ),
+    scenario_property=ScenarioProperty(
+      name=String(id=name.id, content=name.content),
+      description=String(id=description.id, content=description.content),
+    ),
+    players=[
+      PlayerSlot(
+        id=player.id,
+        player_type=player.player_type,
+        race=player.race,
+        unit_count=player.unit_count,
+      )
+      for player in summary.players
+    ],
   )
 
-  return map
 
+def parse_map_summary(content: bytes) -> MapSummary:
+  """Get map overview of map bytes. Runs on worker processes."""
+  return get_map_summary(get_chk(BytesIO(content)))
+
+
+TEMPLATE_MAP_PATH = os.path.join(os.path.dirname(__file__), "rawdata", "original.scx")
 
-def build_map(map: Usemap, delete: bool = True):
+
+@functools.cache
+def get_template_map() -> tuple[bytes, mpqapi.MPQ]:
+  """Template map bytes and its opened MPQ, read once per process and reused by every build."""
+  with open(TEMPLATE_MAP_PATH, "rb") as f:
+    rawfile = f.read()
+
+  return rawfile, mpqapi.MPQ.open(TEMPLATE_MAP_PATH)
+
+
+def build_map(map: Usemap) -> bytes:
   """Build map by eudplib.
 
-  This function uses `eudplib.LoadMap()` and `eudplib.SaveMap()` internally,
-  and eudplib maprw needs original map to initialize map data. So using any
+  eudplib maprw needs original map to initialize map data, so using any
   uncompressed/unprotected map that will be overwritten by rawmap data and
   overrides. In webditor, uses (2)Bottleneck.scx
 
+  Instead of `eudplib.LoadMap()`, template map kept by `get_template_map` is
+  reused, since its scenario.chk is replaced by the built one anyway. Map is
+  saved by `eudplib.SaveMap()` into `BUILD_OUTPUT_DIR`, which is tmpfs by
+  default, and read back at once.
+
   Args:
       rawmap (RawMap): A RawMap object that contains structured map data to serialize.
-      delete (bool, optional): If True, deletes the temporary output file after reading. Defaults to True.
 
   Returns:
       bytes: The compiled SCX map file content as raw bytes.
   """
-  original_fname = "./app/services/rawdata/original.scx"
+  rawfile, template = get_template_map()
 
   serializer = CHKBuilder(map)
 
+  report_progress("transforming")
   transformer = Transformer(map)
   rootf = transformer.transform()
 
-  LoadMap(original_fname)
+  report_progress("serializing")
+  update_filelist_by_listfile(template)
   serialized_chkt = chktok.CHK()
   serialized_chkt.loadchk(serializer.to_bytes())
+  mapdata.init_map_data(serialized_chkt, rawfile)
 
-  with open(original_fname, "rb") as f:
-    rawfile = f.read()
-    mapdata.init_map_data(serialized_chkt, rawfile)
+  # SaveMap only writes by path and reopens what it wrote as MPQ, so memfd can't back it.
+  fd, output_fname = mkstemp(suffix=".scx", dir=BUILD_OUTPUT_DIR)
+  os.close(fd)
+  try:
+    report_progress("saving")
+    CompressPayload(True)
+    SaveMap(output_fname, rootf)
 
-  temp_output_fname = "./output/" + str(uuid.uuid4()) + ".scx"
+    with open(output_fname, "rb") as f:
+      return f.read()
+  finally:
+    os.remove(output_fname)
 
-  CompressPayload(True)
-  SaveMap(temp_output_fname, rootf)
 
-  with open(temp_output_fname, "rb") as f:
-    map_bytes = f.read()
+class MapBodyError(ValueError):
+  """Raised when `Usemap` request body is neither valid JSON nor MessagePack."""
 
-  if delete:
-    os.remove(temp_output_fname)
 
-  return map_bytes
+def build_map_content(body: bytes, encoding: Encoding) -> bytes:
+  """
+  Decode `Usemap` request body and build it. Runs on build worker processes, so the body is
+  validated there instead of being validated and pickled by the server.
+  """
+  report_progress("decoding")
+  try:
+    map = decode(body, Usemap, encoding)
+  except ValidationError:
+    raise
+  except (msgpack.UnpackException, ValueError) as e:
+    # msgpack errors don't survive pickling back to the server.
+    raise MapBodyError(f"Invalid map body: {e}") from None
+
+  return build_map(map)
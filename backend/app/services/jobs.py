@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from typing import Optional
+from pydantic import ValidationError
+from app.core.config import BUILD_JOBS_MAX
+from app.core.w_logging import get_logger
+from app.models.build import BuildJob, BuildStatus
+from app.services.cache import build_cache
+from app.services.encoding import Encoding
+from app.services.io import MapBodyError, build_map_content
+from app.services.workers import WorkerBusyError, build_pool, worker_pool
+import asyncio
+import datetime
+import os
+import uuid
+
+
+def build_key(body: bytes, encoding: Encoding) -> str:
+  """Content hash of `Usemap` request body, keying `build_cache`."""
+  return build_cache.key(body, encoding)
+
+
+def dump_failed_body(body: bytes, encoding: Encoding) -> str:
+  """Save body of failed build under `logs/` for reproducing it. Blocking, run it on I/O pool."""
+  timestamp = datetime.datetime.now(datetime.UTC).strftime("%Y%m%d_%H%M%S")
+  body_path = f"logs/map_{timestamp}.{encoding}"
+  os.makedirs("logs", exist_ok=True)
+
+  with open(body_path, mode="wb") as f:
+    f.write(body)
+
+  return body_path
+
+
+class BuildJobs:
+  """
+  Build jobs of this server process.
+
+  Built maps are kept in `build_cache` by hash of their body, so a body which was built before
+  is done at once, and a body which is being built joins its running job instead of being
+  built twice. Only the latest `max_jobs` jobs are remembered.
+  """
+
+  def __init__(self, max_jobs: int):
+    self.logger = get_logger("build")
+    self.max_jobs = max_jobs
+    self.jobs: OrderedDict[str, BuildJob] = OrderedDict()
+    self.running: dict[str, BuildJob] = {}
+    self.tasks: set[asyncio.Task] = set()
+
+  def get(self, id: str) -> Optional[BuildJob]:
+    return self.jobs.get(id)
+
+  async def submit(self, body: bytes, encoding: Encoding) -> BuildJob:
+    """Start building `body` in background. Raises `WorkerBusyError` when build queue is full."""
+    key = await worker_pool.run_io(build_key, body, encoding)
+    cached = await worker_pool.run_io(build_cache.get_compressed, key) is not None
+    # Checked after the last await, so concurrent submits of a body start one build.
+    if key in self.running:
+      return self.running[key]
+
+    job = BuildJob(id=uuid.uuid4().hex, hash=key)
+    if cached:
+      job.status = "done"
+    elif build_pool.busy:
+      raise WorkerBusyError(f"{build_pool.pending} builds are already pending.")
+    else:
+      self.running[key] = job
+      task = asyncio.create_task(self.build(job, body, encoding))
+      self.tasks.add(task)
+      task.add_done_callback(self.tasks.discard)
+
+    self.jobs[job.id] = job
+    while len(self.jobs) > self.max_jobs:
+      self.jobs.popitem(last=False)
+
+    return job
+
+  async def build(self, job: BuildJob, body: bytes, encoding: Encoding):
+    # Called on a dispatcher thread of `build_pool`, not on the event loop.
+    def progress(phase: BuildStatus):
+      job.status = phase
+
+    try:
+      map_bytes = await build_pool.run_reporting(
+        progress, build_map_content, body, encoding
+      )
+      await worker_pool.run_io(build_cache.put, job.hash, map_bytes)
+      job.status = "done"
+    except (ValidationError, MapBodyError) as e:
+      job.status, job.error = "failed", str(e)
+    except Exception as e:
+      self.logger.critical(f"Build job {job.id} was failed, because of {e}.")
+      body_path = await worker_pool.run_io(dump_failed_body, body, encoding)
+      self.logger.info(f"Map structure saved in {body_path}")
+      job.status, job.error = "failed", str(e)
+    finally:
+      self.running.pop(job.hash, None)
+
+  async def artifact(self, job: BuildJob) -> Optional[bytes]:
+    """Built map of done job, or `None` when it was evicted from `build_cache`."""
+    return await worker_pool.run_io(build_cache.get, job.hash)
+
+
+build_jobs = BuildJobs(BUILD_JOBS_MAX)
@@ -1,6 +1,9 @@
 from functools import cached_property
 from app.core.w_logging import get_logger
 from app.models.project import Usemap
+from app.models.string import String
+from app.models.terrain import RasterLayer
+from app.services.definition_index import DefinitionIndex
 from app.services.utils.player import (
   OwnrPlayerTypeDict,
   SidePlayerRaceDict,
@@ -9,9 +12,14 @@ from app.services.utils.player import (
 )
 from app.services.utils.tileset import EraTilesetDict, EraTilesetReverseDict
 from eudplib.core.mapdata.chktok import CHK as EPCHK
-from typing import Literal, TypedDict, cast
-from ..utils.reverse import reverse_tbl_dict
+from typing import Iterator, Literal, Optional, TypedDict, cast
+from ..utils.reverse import unit_names
 from app.types import chk_types, spatial
+from .partition import TypePartition
+from .raster import MaskLayer, TileLayer
+from .section import SECTION_HEADER, SectionIndex, SectionPlan, section_name
+from .string_table import StringTable
+import numpy as np
 import struct
 
 CHK_FORMATDICT: dict[str, str] = {
@@ -38,6 +46,11 @@ CHK_FORMATDICT: dict[str, str] = {
   "VCOD": "256I16B",
 }
 
+CHK_STRUCTDICT: dict[str, struct.Struct] = {
+  name: struct.Struct(f"<{fmt}") for name, fmt in CHK_FORMATDICT.items()
+}
+"""Precompiled `CHK_FORMATDICT` formats, little-endian and without padding."""
+
 DEFAULT_PLAYER_COLOR = (
   (244, 4, 4),
   (12, 72, 204),
@@ -55,6 +68,16 @@ DEFAULT_PLAYER_COLOR = (
 )
 
 
+def unpack_records(name: str, data: bytes | memoryview) -> Iterator[tuple]:
+  """Decode every fixed-size record of a section in a single `iter_unpack` pass.
+
+  A trailing partial record is ignored, as StarCraft does.
+  """
+  record = CHK_STRUCTDICT[name]
+  usable = len(data) - len(data) % record.size
+  return record.iter_unpack(memoryview(data)[:usable])
+
+
 class TerrainSections(TypedDict):
   DIM: bytes
   ERA: bytes
@@ -74,29 +97,41 @@ class CHK:
   """
 
   units: list[chk_types.UnitSetting]
-  chkt: EPCHK
-
-  def __init__(self, chkt: EPCHK):
+  chkt: Optional[EPCHK]
+  sections: SectionIndex
+
+  def __init__(
+    self, chkt: Optional[EPCHK] = None, *, raw: Optional[bytes | memoryview] = None
+  ):
+    """
+    Args:
+        chkt (EPCHK, optional): Tokenized chk by eudplib.
+        raw (bytes, optional): Raw scenario.chk buffer. Sections are read directly from it
+          without being tokenized, so they are never copied.
+    """
     self.logger = get_logger("CHK")
     self.chkt = chkt
 
+    if raw is not None:
+      self.sections = SectionIndex(raw)
+    elif chkt is not None:
+      self.sections = SectionIndex.from_chkt(chkt)
+    else:
+      raise ValueError("CHK requires either tokenized chkt or raw scenario.chk bytes.")
+
   """
   Unit section processings 
   """
 
   @cached_property
   def unit_definitions(self) -> list[chk_types.UnitSetting]:
-    from eudplib.core.rawtrigger.strdict import DefUnitDict
-
     result: list[chk_types.UnitSetting] = []
 
-    unpacked = struct.unpack(CHK_FORMATDICT["UNIx"], self.chkt.getsection("UNIx"))
+    unpacked = CHK_STRUCTDICT["UNIx"].unpack(self.sections.getsection("UNIx"))
     for id in range(228):
       unitname_id: int = unpacked[id + (228 * 7)]
       unit_name = (
-        self.strings[unitname_id].content
-        if unitname_id != 0
-        else reverse_tbl_dict(DefUnitDict)[id]
+        self.strings[unitname_id].content if unitname_id != 0 else unit_names()[id]
       )
       stat = chk_types.Stat(
         hit_points=unpacked[id + 228],
@@ -124,16 +159,8 @@ class CHK:
 
   @cached_property
   def placed_units(self) -> list[chk_types.Unit]:
-    unit_bytes = self.chkt.getsection("UNIT")
-    format_size = struct.calcsize(CHK_FORMATDICT["UNIT"])
-    unit_count = len(unit_bytes) // format_size
-
     result: list[chk_types.Unit] = []
-    for i in range(0, unit_count):
-      unit = struct.unpack(
-        CHK_FORMATDICT["UNIT"], unit_bytes[i * format_size : (i + 1) * format_size]
-      )
-
+    for unit in unpack_records("UNIT", self.sections.getsection("UNIT")):
       result.append(
         chk_types.Unit(
           serial_number=unit[0],
@@ -158,16 +185,8 @@ class CHK:
 
   @cached_property
   def unit_properties(self) -> list[chk_types.UnitProperty]:
-    uprp_bytes = self.chkt.getsection("UPRP")
-    format_size = struct.calcsize(CHK_FORMATDICT["UPRP"])
-    section_count = len(uprp_bytes) // format_size
-
     result: list[chk_types.UnitProperty] = []
-    for i in range(section_count):
-      index = format_size * i
-      uprp = struct.unpack(
-        CHK_FORMATDICT["UPRP"], uprp_bytes[index : index + format_size]
-      )
+    for uprp in unpack_records("UPRP", self.sections.getsection("UPRP")):
       result.append(
         chk_types.UnitProperty(
           special_properties=chk_types.SpecialPropertiesFlag(uprp[0]),
@@ -189,7 +208,7 @@ class CHK:
 
   @cached_property
   def unit_restrictions(self) -> list[chk_types.UnitRestriction]:
-    puni_bytes = self.chkt.getsection("PUNI")
+    puni_bytes = self.sections.getsection("PUNI")
 
     UNIT_COUNT = 228
     PLAYER_COUNT = 12
@@ -242,7 +261,7 @@ class CHK:
   def weapons(self) -> list[chk_types.Weapon]:
     result: list[chk_types.Weapon] = []
 
-    unpacked = struct.unpack(CHK_FORMATDICT["UNIx"], self.chkt.getsection("UNIx"))[
+    unpacked = CHK_STRUCTDICT["UNIx"].unpack(self.sections.getsection("UNIx"))[
       228 * 8 :
     ]
     for id in range(130):
@@ -261,8 +280,8 @@ class CHK:
 
   @cached_property
   def terrain(self) -> chk_types.Terrain:
-    dim = struct.unpack(CHK_FORMATDICT["DIM "], self.chkt.getsection("DIM "))
-    era = struct.unpack(CHK_FORMATDICT["ERA "], self.chkt.getsection("ERA "))
+    dim = CHK_STRUCTDICT["DIM "].unpack(self.sections.getsection("DIM "))
+    era = CHK_STRUCTDICT["ERA "].unpack(self.sections.getsection("ERA "))
 
     dimension: spatial.Size = spatial.Size(width=dim[0], height=dim[1])
     tileset = era[0]
@@ -273,22 +292,12 @@ class CHK:
     return chk_types.Terrain(size=dimension, tileset=EraTilesetDict[tileset])
 
   @cached_property
-  def tiles(self) -> list[chk_types.Tile]:
+  def tiles(self) -> TileLayer:
     terrain = self.terrain
-    mtxm = struct.unpack(
-      f"{terrain.size.width * terrain.size.height}H", self.chkt.getsection("MTXM")
+    result = TileLayer.from_bytes(
+      self.sections.getsection("MTXM"), terrain.size.width, terrain.size.height
     )
 
-    result: list[chk_types.Tile] = []
-    for y in range(terrain.size.height):
-      for x in range(terrain.size.width):
-        tile = chk_types.Tile(
-          group=mtxm[y * terrain.size.width + x] >> 4,
-          id=mtxm[y * terrain.size.width + x] & 0xF,
-          position=spatial.Position(x=x, y=y),
-        )
-        result.append(tile)
-
     self.logger.debug(f"get_tile complete. {len(result)} tiles parsed.")
     return result
 
@@ -298,9 +307,9 @@ class CHK:
 
   @cached_property
   def players(self) -> list[chk_types.Player]:
-    ownr = struct.unpack(CHK_FORMATDICT["OWNR"], self.chkt.getsection("OWNR"))
-    side = struct.unpack(CHK_FORMATDICT["SIDE"], self.chkt.getsection("SIDE"))
-    colr = struct.unpack(CHK_FORMATDICT["COLR"], self.chkt.getsection("COLR"))
+    ownr = CHK_STRUCTDICT["OWNR"].unpack(self.sections.getsection("OWNR"))
+    side = CHK_STRUCTDICT["SIDE"].unpack(self.sections.getsection("SIDE"))
+    colr = CHK_STRUCTDICT["COLR"].unpack(self.sections.getsection("COLR"))
 
     result: list[chk_types.Player] = [
       chk_types.Player(
@@ -325,7 +334,7 @@ class CHK:
         player.color = colr[index]
         player.rgb_color = DEFAULT_PLAYER_COLOR[player.color]
 
-    FORC = struct.unpack("8B 4H 4B", self.chkt.getsection("FORC"))
+    FORC = struct.unpack("8B 4H 4B", self.sections.getsection("FORC"))
     P = FORC[0:8]
     for index, value in enumerate(P):
       result[index].force.id = value
@@ -335,7 +344,7 @@ class CHK:
 
   @cached_property
   def forces(self) -> list[chk_types.Force]:
-    FORC = struct.unpack("8B 4H 4B", self.chkt.getsection("FORC"))
+    FORC = struct.unpack("8B 4H 4B", self.sections.getsection("FORC"))
 
     result: list[chk_types.Force] = []
     for i in range(4):
@@ -357,15 +366,8 @@ class CHK:
 
   @cached_property
   def locations(self) -> list[chk_types.Location]:
-    mrgn_bytes = self.chkt.getsection("MRGN")
-    format_size = struct.calcsize(CHK_FORMATDICT["MRGN"])
-    location_count = len(mrgn_bytes) // format_size
-
     result: list[chk_types.Location] = []
-    for i in range(0, location_count):
-      MRGN = struct.unpack(
-        CHK_FORMATDICT["MRGN"], mrgn_bytes[i * format_size : (i + 1) * format_size]
-      )
+    for i, MRGN in enumerate(unpack_records("MRGN", self.sections.getsection("MRGN"))):
       if (MRGN[0], MRGN[1], MRGN[2], MRGN[3]) != (0, 0, 0, 0) and i != 63:
         result.append(
           chk_types.Location(
@@ -386,15 +388,8 @@ class CHK:
 
   @cached_property
   def sprites(self) -> list[chk_types.Sprite]:
-    thg2_bytes = self.chkt.getsection("THG2")
-    format_size = struct.calcsize(CHK_FORMATDICT["THG2"])
-    sprite_count = len(thg2_bytes) // format_size
-
     result: list[chk_types.Sprite] = []
-    for i in range(0, sprite_count):
-      sprite = struct.unpack(
-        CHK_FORMATDICT["THG2"], thg2_bytes[i * format_size : (i + 1) * format_size]
-      )
+    for sprite in unpack_records("THG2", self.sections.getsection("THG2")):
       result.append(
         chk_types.Sprite(
           sprite_id=sprite[0],
@@ -412,30 +407,18 @@ class CHK:
   """
 
   @cached_property
-  def strings(self) -> list[chk_types.String]:
-    str_section = "STRx" if b"STRx" in self.chkt.sections else "STR "
-    size = 2 if str_section == "STR " else 4
-    format = "H" if str_section == "STR " else "I"
-    str_bytes = self.chkt.getsection(str_section)
-    string_count = struct.unpack(format, str_bytes[0:size])[0]
-    offsets = [
-      struct.unpack(format, str_bytes[i : i + size])[0]
-      for i in range(size, size + size * string_count, size)
-    ]
-
-    result: list[chk_types.String] = []
-    for i in range(string_count):
-      start = offsets[i]
-      end = offsets[i + 1] if i + 1 < len(offsets) else len(str_bytes)
-      string_content = str_bytes[start:end].split(b"\x00")[0].decode("utf-8")
-      result.append(chk_types.String(id=i, content=string_content))
+  def strings(self) -> StringTable:
+    str_section = "STRx" if "STRx" in self.sections else "STR "
+    result = StringTable.from_section(
+      self.sections.getsection(str_section), str_section
+    )
 
-    self.logger.debug(f"get_strings complete. {len(result)} strings parsed.")
+    self.logger.debug(f"get_strings complete. {len(result)} strings indexed.")
     return result
 
   @cached_property
   def scenario_properties(self) -> chk_types.ScenarioProperty:
-    SPRP = struct.unpack("2H", self.chkt.getsection("SPRP"))
+    SPRP = struct.unpack("2H", self.sections.getsection("SPRP"))
     name = self.strings[SPRP[0] - 1]
     description = self.strings[SPRP[1] - 1]
 
@@ -451,10 +434,10 @@ class CHK:
 
   @cached_property
   def validation(self) -> chk_types.Validation:
-    ver_bytes = self.chkt.getsection("VER ")
+    ver_bytes = self.sections.getsection("VER ")
 
     # FIXME: VCOD validation need
-    vcod_bytes = self.chkt.getsection("VCOD")
+    vcod_bytes = self.sections.getsection("VCOD")
 
     self.logger.debug("get_validation complete.")
     return chk_types.Validation(
@@ -463,20 +446,12 @@ class CHK:
     )
 
   @cached_property
-  def mask(self) -> list[chk_types.Mask]:
-    mask_bytes = self.chkt.getsection("MASK")
-
-    result: list[chk_types.Mask] = []
-    for x in range(self.terrain.size.height):
-      for y in range(self.terrain.size.width):
-        position = y * self.terrain.size.width + x
-        flag = struct.unpack("B", mask_bytes[position : position + 1])[0]
-        result.append(
-          chk_types.Mask(
-            position=spatial.Position(x=x, y=y),
-            flags=chk_types.MaskFlag(flag),
-          )
-        )
+  def mask(self) -> MaskLayer:
+    result = MaskLayer.from_bytes(
+      self.sections.getsection("MASK"),
+      self.terrain.size.width,
+      self.terrain.size.height,
+    )
 
     self.logger.debug("get_mask complete.")
     return result
@@ -487,7 +462,7 @@ class CHK:
 
   @cached_property
   def upgrade_restrictions(self) -> list[chk_types.UpgradeRestriction]:
-    pupx_bytes = self.chkt.getsection("PUPx")
+    pupx_bytes = self.sections.getsection("PUPx")
 
     UPGRADE_COUNT = 61
     PLAYER_COUNT = 12
@@ -539,7 +514,7 @@ class CHK:
 
   @cached_property
   def tech_restrictions(self) -> list[chk_types.TechRestriction]:
-    ptex_bytes = self.chkt.getsection("PTEx")
+    ptex_bytes = self.sections.getsection("PTEx")
 
     TECH_COUNT = 44
     PLAYER_COUNT = 12
@@ -599,7 +574,7 @@ class CHK:
 
   @cached_property
   def upgrade_settings(self) -> list[chk_types.Upgrade]:
-    upgx_bytes = self.chkt.getsection("UPGx")
+    upgx_bytes = self.sections.getsection("UPGx")
     UPGx = struct.unpack(f"61B B {61 * 6}H", upgx_bytes)
 
     UPGRADE_COUNT = 61
@@ -636,7 +611,7 @@ class CHK:
 
   @cached_property
   def technologies(self) -> list[chk_types.Technology]:
-    tecx_bytes = self.chkt.getsection("TECx")
+    tecx_bytes = self.sections.getsection("TECx")
     TECx = struct.unpack("44B 44H 44H 44H 44H", tecx_bytes)
 
     TECH_COUNT = 44
@@ -668,167 +643,280 @@ class CHK:
 
   @cached_property
   def triggers(self) -> chk_types.Trigger:
-    trig_bytes = self.chkt.getsection("TRIG")
+    trig_bytes = self.sections.getsection("TRIG")
 
     self.logger.debug("get_triggers complete.")
     return chk_types.Trigger(raw_data=trig_bytes)
 
   @cached_property
   def mbrf_triggers(self) -> chk_types.Trigger:
-    mbrf_bytes = self.chkt.getsection("MBRF")
+    mbrf_bytes = self.sections.getsection("MBRF")
 
     self.logger.debug("get_mbrf_triggers complete.")
     return chk_types.Trigger(raw_data=mbrf_bytes)
 
+  """
+  Summary processings
+  """
+
+  @cached_property
+  def unit_counts(self) -> list[int]:
+    """Placed unit count of each player, counted over owner bytes of UNIT records."""
+    if "UNIT" not in self.sections:
+      return [0] * 12
+
+    unit = self.sections.getsection("UNIT")
+    record_size = CHK_STRUCTDICT["UNIT"].size
+    count = len(unit) // record_size
+    records = np.frombuffer(unit, dtype=np.uint8, count=count * record_size)
+    owners = records.reshape(count, record_size)[:, 16]
+    result = np.bincount(owners, minlength=12)[:12].tolist()
+
+    self.logger.debug(f"get_unit_counts complete. {count} units counted.")
+    return result
+
+  @cached_property
+  def summary(self) -> chk_types.MapSummary:
+    """
+    Map overview which only reads DIM, ERA, OWNR, SIDE, SPRP, UNIT and scenario strings.
+
+    Every other section, including the rest of the string table, is left untouched.
+    """
+    ownr = CHK_STRUCTDICT["OWNR"].unpack(self.sections.getsection("OWNR"))
+    side = CHK_STRUCTDICT["SIDE"].unpack(self.sections.getsection("SIDE"))
+    unit_counts = self.unit_counts
+
+    players = [
+      chk_types.PlayerSlot(
+        id=id,
+        player_type=OwnrPlayerTypeDict[ownr[id]],
+        race=SidePlayerRaceDict[side[id]],
+        unit_count=unit_counts[id],
+      )
+      for id in range(12)
+    ]
+
+    self.logger.debug("get_summary complete.")
+    return chk_types.MapSummary(
+      terrain=self.terrain,
+      scenario_property=self.scenario_properties,
+      players=players,
+    )
+
+
+BUILD_STRUCTDICT: dict[str, struct.Struct] = {
+  name: struct.Struct(f"<{fmt}")
+  for name, fmt in {
+    "UNIx": f"228B 228I 228H 228B {4 * 228}H {2 * 130}H",
+    "PUPx": f"{61 * 12}B {61 * 12}B {61 * 2}B {61 * 12}B",
+    "UPGx": f"61B B {6 * 61}H",
+    "TECx": f"44B {4 * 44}H",
+    "FORC": "8B4H4B",
+    "COLR": "8B",
+    "PLAYER": "12B",
+  }.items()
+}
+"""Precompiled formats which `CHKBuilder` writes, beside the ones in `CHK_STRUCTDICT`."""
+
+USED_SECTION = (
+  "VER",
+  "VCOD",
+  "OWNR",
+  "SIDE",
+  "COLR",
+  "ERA",
+  "DIM",
+  "MTXM",
+  "UNIT",
+  "PUNI",
+  "UNIx",
+  "PUPx",
+  "UPGx",
+  "THG2",
+  "MASK",
+  "MRGN",
+  "STRx",
+  "SPRP",
+  "FORC",
+  "PTEx",
+  "TECx",
+  "MBRF",
+  "TRIG",
+  "UPRP",
+)
+"""Sections written by `CHKBuilder`, in order."""
 
-def section(name: str, data: bytes) -> bytes:
-  header = struct.pack("<4sI", name.encode(), len(data))
-  return header + data
+
+def packed(record: struct.Struct, *values) -> SectionPlan:
+  """Payload of a single fixed-format record."""
+  return SectionPlan(record.size, lambda view: record.pack_into(view, 0, *values))
 
 
 class CHKBuilder:
   """
   CHKBuilder is a class that builds a CHK file from a Usemap.
+
+  Every section is planned first, so the whole CHK is sized up front and each section payload is
+  written in place into a single output buffer.
   """
 
   def __init__(self, map: Usemap):
     self.map = map
     self.logger = get_logger("CHK")
+    # Every section takes its entities and assets from these, instead of scanning whole lists.
+    self.entities = TypePartition(map.entities)
+    self.assets = TypePartition(map.assets)
 
-  def to_bytes(self) -> bytes:
-    USED_SECTION = (
-      "VER",
-      "VCOD",
-      "OWNR",
-      "SIDE",
-      "COLR",
-      "ERA",
-      "DIM",
-      "MTXM",
-      "UNIT",
-      "PUNI",
-      "UNIx",
-      "PUPx",
-      "UPGx",
-      "THG2",
-      "MASK",
-      "MRGN",
-      "STRx",
-      "SPRP",
-      "FORC",
-      "PTEx",
-      "TECx",
-      "MBRF",
-      "TRIG",
-      "UPRP",
-    )
-    b = bytearray()
+  @cached_property
+  def definitions(self) -> DefinitionIndex:
+    return DefinitionIndex(self.map, self.assets)
 
-    for section_name in USED_SECTION:
+  def plan(self) -> list[tuple[bytes, SectionPlan]]:
+    plans: list[tuple[bytes, SectionPlan]] = []
+    for name in USED_SECTION:
       try:
-        section_bytes = getattr(self, section_name)
-        b += section_bytes
+        plans.append((section_name(name), getattr(self, name)))
       except AttributeError:
-        print(f"Section '{section_name}' not implemented in CHKSerializer.")
+        print(f"Section '{name}' not implemented in CHKSerializer.")
+
+    return plans
+
+  def to_buffer(self) -> bytearray:
+    plans = self.plan()
+    buffer = bytearray(sum(SECTION_HEADER.size + plan.size for _, plan in plans))
+
+    with memoryview(buffer) as view:
+      offset = 0
+      for name, plan in plans:
+        SECTION_HEADER.pack_into(buffer, offset, name, plan.size)
+        offset += SECTION_HEADER.size
+        plan.write(view[offset : offset + plan.size])
+        offset += plan.size
+
+    return buffer
+
+  def to_bytes(self) -> bytes:
+    return bytes(self.to_buffer())
+
+  def terrain_raster(self, raster: RasterLayer, dtype: str) -> RasterLayer:
+    size = self.map.terrain.size
+    if raster.dtype != dtype:
+      raise ValueError(f"Expected {dtype} raster, got {raster.dtype}.")
+    if (raster.width, raster.height) != (size.width, size.height):
+      raise ValueError(
+        f"Raster is {raster.width}x{raster.height}, but terrain is {size.width}x{size.height}."
+      )
+
+    return raster
 
-    return bytes(b)
+  @cached_property
+  def string_index(self) -> dict[str, String]:
+    """
+    First string of each content. Like `STRx` offsets, duplicated contents resolve to the first.
+    """
+    index: dict[str, String] = {}
+    for string in self.map.string:
+      index.setdefault(string.content, string)
 
-  def find_string_by_content(self, content: str):
-    ref = next((s for s in self.map.string if s.content == content), None)
+    return index
+
+  def find_string_by_content(self, content: str) -> String:
+    ref = self.string_index.get(content)
     if ref is None:
       raise IndexError(f"Cannot find string {content} on table.")
 
     return ref
 
   @property
-  def VER(self) -> bytes:
-    return b"".join([section("VER ", self.map.validation.ver)])
+  def VER(self) -> SectionPlan:
+    return SectionPlan.copy(self.map.validation.ver)
 
   @property
-  def VCOD(self) -> bytes:
+  def VCOD(self) -> SectionPlan:
     # FIXME: Processing VCOD, checksum
-    return b"".join([section("VCOD", self.map.validation.vcod)])
+    return SectionPlan.copy(self.map.validation.vcod)
 
   @property
-  def OWNR(self) -> bytes:
-    b = bytearray()
-    for p in self.map.player:
-      b += OwnrPlayerTypeReverseDict[p.player_type].to_bytes(1, byteorder="little")
-
-    return section("OWNR", b)
+  def OWNR(self) -> SectionPlan:
+    return SectionPlan.copy(
+      bytes(OwnrPlayerTypeReverseDict[p.player_type] for p in self.map.player)
+    )
 
   @property
-  def ERA(self) -> bytes:
-    b = EraTilesetReverseDict[self.map.terrain.tileset].to_bytes(2, byteorder="little")
-    return section("ERA ", b)
+  def ERA(self) -> SectionPlan:
+    return packed(
+      CHK_STRUCTDICT["ERA "], EraTilesetReverseDict[self.map.terrain.tileset]
+    )
 
   @property
-  def DIM(self) -> bytes:
-    b = struct.pack("<2H", self.map.terrain.size.width, self.map.terrain.size.height)
-    return section("DIM ", b)
+  def DIM(self) -> SectionPlan:
+    size = self.map.terrain.size
+    return packed(CHK_STRUCTDICT["DIM "], size.width, size.height)
 
   @property
-  def SIDE(self) -> bytes:
-    b = bytearray()
-    for p in self.map.player:
-      b += SidePlayerRaceReverseDict[p.race].to_bytes(1, byteorder="little")
-
-    return section("SIDE", b)
+  def SIDE(self) -> SectionPlan:
+    return SectionPlan.copy(
+      bytes(SidePlayerRaceReverseDict[p.race] for p in self.map.player)
+    )
 
   @property
-  def MTXM(self) -> bytes:
+  def MTXM(self) -> SectionPlan:
     from app.models.entities.tile import Tile
 
-    tiles = [t.data for t in self.map.entities if isinstance(t.data, Tile)]
+    height, width = self.map.terrain.size.height, self.map.terrain.size.width
+    size = width * height * 2
+    if self.map.terrain.tiles is not None:
+      data = memoryview(self.terrain_raster(self.map.terrain.tiles, "uint16").data)
+      self.logger.info(f"Attemping to pack {width}x{height} tile raster")
+
+      def write_raster(view: memoryview):
+        # Missing cells are tile 0, which the zeroed view already holds.
+        count = min(len(data) // 2 * 2, size)
+        view[:count] = data[:count]
+
+      return SectionPlan(size, write_raster)
+
+    tiles = self.entities.of(Tile)
     self.logger.info(f"Attemping to pack {len(tiles)} tiles")
 
-    tile_map = {
-      (tile.transform.position.x, tile.transform.position.y): (
-        (tile.group << 4) | (tile.tile_id & 0xF)
-      )
-      for tile in tiles
-    }
-    b = bytearray()
+    def write(view: memoryview):
+      cells = [0] * (width * height)
+      for tile in tiles:
+        x, y = tile.transform.position.x, tile.transform.position.y
+        if 0 <= x < width and 0 <= y < height:
+          cells[y * width + x] = (tile.group << 4) | (tile.tile_id & 0xF)
 
-    for y in range(self.map.terrain.size.height):
-      for x in range(self.map.terrain.size.width):
-        v = tile_map.get((x, y)) if tile_map.get((x, y)) is not None else 0
-        b += struct.pack("<H", v)
+      struct.pack_into(f"<{len(cells)}H", view, 0, *cells)
 
-    return section("MTXM", b)
+    return SectionPlan(size, write)
 
   @property
-  def PUNI(self) -> bytes:
+  def PUNI(self) -> SectionPlan:
     from app.models.definitions.unit import UnitRestriction
 
-    b = bytearray()
-
-    restrictions = [
-      r.data for r in self.map.assets if isinstance(r.data, UnitRestriction)
-    ]
-    availability = [struct.pack("<12B", *v.availability) for v in restrictions]
-    global_availability = [
-      struct.pack("<B", v.global_availability) for v in restrictions
-    ]
-    uses_defaults = [struct.pack("<12B", *v.uses_defaults) for v in restrictions]
+    restrictions = self.assets.of(UnitRestriction)
+    player = BUILD_STRUCTDICT["PLAYER"]
+    count = len(restrictions)
 
-    b += b"".join(availability)
-    b += b"".join(global_availability)
-    b += b"".join(uses_defaults)
+    def write(view: memoryview):
+      for i, v in enumerate(restrictions):
+        player.pack_into(view, i * player.size, *v.availability)
+        view[count * player.size + i] = v.global_availability
+        player.pack_into(
+          view, count * (player.size + 1) + i * player.size, *v.uses_defaults
+        )
 
-    return section("PUNI", b)
+    return SectionPlan(count * (player.size * 2 + 1), write)
 
   @property
-  def UPGx(self) -> bytes:
+  def UPGx(self) -> SectionPlan:
     from app.models.definitions.tech import Upgrade
 
-    upgrade_settings = [
-      _a.data for _a in self.map.assets if isinstance(_a.data, Upgrade)
-    ]
+    upgrade_settings = self.assets.of(Upgrade)
     self.logger.info(f"Attemping to pack {len(upgrade_settings)} upgrades")
 
-    b = struct.pack(
-      f"<61B B {6 * 61}H",
+    return packed(
+      BUILD_STRUCTDICT["UPGx"],
       *[u.use_default for u in upgrade_settings],
       0x72,
       *[u.base_cost.mineral for u in upgrade_settings],
@@ -839,111 +927,123 @@ class CHKBuilder:
       *[u.factor_cost.time for u in upgrade_settings],
     )
 
-    return section("UPGx", b)
-
   @property
-  def PTEx(self) -> bytes:
+  def PTEx(self) -> SectionPlan:
     from app.models.definitions.tech import TechRestriction
 
-    b = bytearray()
-
-    restrictions = [
-      r.data for r in self.map.assets if isinstance(r.data, TechRestriction)
-    ]
-    b += b"".join([struct.pack("<12B", *v.player_availability) for v in restrictions])
-    b += b"".join(
-      [struct.pack("<12B", *v.player_already_researched) for v in restrictions]
-    )
-    b += b"".join([struct.pack("<B", v.default_availability) for v in restrictions])
-    b += b"".join(
-      [struct.pack("<B", v.default_already_researched) for v in restrictions]
-    )
-    b += b"".join([struct.pack("<12B", *v.uses_default) for v in restrictions])
+    restrictions = self.assets.of(TechRestriction)
+    player = BUILD_STRUCTDICT["PLAYER"]
+    count = len(restrictions)
+    researched_offset = count * player.size
+    defaults_offset = researched_offset * 2
+    uses_default_offset = defaults_offset + count * 2
+
+    def write(view: memoryview):
+      for i, v in enumerate(restrictions):
+        player.pack_into(view, i * player.size, *v.player_availability)
+        player.pack_into(
+          view, researched_offset + i * player.size, *v.player_already_researched
+        )
+        view[defaults_offset + i] = v.default_availability
+        view[defaults_offset + count + i] = v.default_already_researched
+        player.pack_into(view, uses_default_offset + i * player.size, *v.uses_default)
 
-    return section("PTEx", b)
+    return SectionPlan(uses_default_offset + count * player.size, write)
 
   @property
-  def UNIT(self) -> bytes:
+  def UNIT(self) -> SectionPlan:
     from app.models.entities.unit import Unit
 
-    b = bytearray()
-
-    units = [u.data for u in self.map.entities if isinstance(u.data, Unit)]
-
-    for unit in units:
-      unit_ref = unit.unit_definition
-      b += struct.pack(
-        "<I 6H 4B I 2H 2I",
-        unit.serial_number if unit.serial_number is not None else 0,
-        unit.transform.position.x,
-        unit.transform.position.y,
-        unit_ref.id,
-        unit.relation_type,
-        unit.special_properties,
-        unit.valid_properties,
-        unit.owner.id,
-        unit_ref.stats.hit_points.current * 100 // unit_ref.stats.hit_points.max
-        if unit_ref.stats.hit_points.max != 0
-        else 100,
-        unit_ref.stats.shield_points.current * 100 // unit_ref.stats.shield_points.max
-        if unit_ref.stats.shield_points.max != 0
-        else 100,
-        unit_ref.stats.energy_points.current,
-        unit.resource_amount,
-        unit.hangar,
-        unit.unit_state,
-        0,
-        unit.related_unit,
-      )
+    units = self.entities.of(Unit)
+    record = CHK_STRUCTDICT["UNIT"]
+
+    def write(view: memoryview):
+      for i, unit in enumerate(units):
+        unit_ref = self.definitions.unit(unit)
+        record.pack_into(
+          view,
+          i * record.size,
+          unit.serial_number if unit.serial_number is not None else 0,
+          unit.transform.position.x,
+          unit.transform.position.y,
+          unit_ref.id,
+          unit.relation_type,
+          unit.special_properties,
+          unit.valid_properties,
+          unit.owner.id,
+          unit_ref.stats.hit_points.current * 100 // unit_ref.stats.hit_points.max
+          if unit_ref.stats.hit_points.max != 0
+          else 100,
+          unit_ref.stats.shield_points.current * 100 // unit_ref.stats.shield_points.max
+          if unit_ref.stats.shield_points.max != 0
+          else 100,
+          unit_ref.stats.energy_points.current,
+          unit.resource_amount,
+          unit.hangar,
+          unit.unit_state,
+          0,
+          unit.related_unit,
+        )
 
-    return section("UNIT", b)
+    return SectionPlan(len(units) * record.size, write)
 
   @property
-  def THG2(self) -> bytes:
+  def THG2(self) -> SectionPlan:
     from app.models.entities.sprite import Sprite
 
-    b = bytearray()
-
-    sprites = [s.data for s in self.map.entities if isinstance(s.data, Sprite)]
-
-    for sprite in sprites:
-      b += struct.pack(
-        "<3H2BH",
-        sprite.definition.id,
-        sprite.transform.position.x,
-        sprite.transform.position.y,
-        sprite.owner.id,
-        0,
-        sprite.flags,
-      )
+    sprites = self.entities.of(Sprite)
+    record = CHK_STRUCTDICT["THG2"]
+
+    def write(view: memoryview):
+      for i, sprite in enumerate(sprites):
+        record.pack_into(
+          view,
+          i * record.size,
+          self.definitions.sprite(sprite).id,
+          sprite.transform.position.x,
+          sprite.transform.position.y,
+          sprite.owner.id,
+          0,
+          sprite.flags,
+        )
 
-    return section("THG2", b)
+    return SectionPlan(len(sprites) * record.size, write)
 
   @property
-  def MASK(self) -> bytes:
+  def MASK(self) -> SectionPlan:
     from app.models.entities.mask import Mask
 
-    b = bytearray()
     height, width = self.map.terrain.size.height, self.map.terrain.size.width
-    masks = [m.data for m in self.map.entities if isinstance(m.data, Mask)]
+    size = width * height
+    if self.map.terrain.mask is not None:
+      data = memoryview(self.terrain_raster(self.map.terrain.mask, "uint8").data)
+
+      def write_raster(view: memoryview):
+        # Missing cells are fully fogged, as `MaskLayer.from_bytes` reads them.
+        count = min(len(data), size)
+        view[:count] = data[:count]
+        np.frombuffer(view, dtype=np.uint8)[count:] = 0xFF
 
-    for y in range(height):
-      for x in range(width):
-        b += struct.pack("<B", masks[y * width + x].flags)
+      return SectionPlan(size, write_raster)
 
-    return section("MASK", b)
+    masks = self.entities.of(Mask)
+
+    def write(view: memoryview):
+      np.frombuffer(view, dtype=np.uint8)[:] = np.fromiter(
+        (m.flags for m in masks), dtype=np.uint8, count=size
+      )
+
+    return SectionPlan(size, write)
 
   @property
-  def STRx(self, encoding: Literal["utf-8", "CP949"] = "utf-8") -> bytes:
-    b = bytearray()
+  def STRx(self, encoding: Literal["utf-8", "CP949"] = "utf-8") -> SectionPlan:
     string_count = len(self.map.string)
+    header = struct.Struct(f"<I{string_count}I")
 
-    offset = 4 + 4 * string_count
-
-    b += struct.pack("<I", len(self.map.string))
+    offset = header.size
     offsets = []
 
-    binary_string = bytearray()
+    binary_strings: list[bytes] = []
     string_table = {}
     for string in self.map.string:
       encoded_content = string.content.encode(encoding) + b"\x00"
@@ -954,112 +1054,101 @@ class CHKBuilder:
         string_table[encoded_content] = offset
         offsets.append(offset)
         offset += len(encoded_content)
-        binary_string += encoded_content
+        binary_strings.append(encoded_content)
 
-    for o in offsets:
-      b += struct.pack("<I", o)
+    def write(view: memoryview):
+      header.pack_into(view, 0, string_count, *offsets)
+      start = header.size
+      for encoded_content in binary_strings:
+        view[start : start + len(encoded_content)] = encoded_content
+        start += len(encoded_content)
 
-    b.extend(binary_string)
-    return section("STRx", b)
+    return SectionPlan(offset, write)
 
   @property
-  def UPRP(self) -> bytes:
-    b = bytearray()
-
+  def UPRP(self) -> SectionPlan:
     properties = self.map.unit_properties
     self.logger.info(f"Attemping to pack {len(properties)} unit properties")
+    record = CHK_STRUCTDICT["UPRP"]
+
+    def write(view: memoryview):
+      for i, uproperty in enumerate(properties):
+        record.pack_into(
+          view,
+          i * record.size,
+          uproperty.special_properties,
+          uproperty.valid_properties,
+          0,  # Owner in UPRP section always NULL
+          uproperty.hit_point_percent,
+          uproperty.shield_point_percent,
+          uproperty.energy_point_percent,
+          uproperty.resource_amount,
+          uproperty.units_in_hangar,
+          uproperty.flags,
+          0,  # Unknown/unused. Padding?
+        )
 
-    for uproperty in properties:
-      b += struct.pack(
-        "<2H4BI2HI",
-        uproperty.special_properties,
-        uproperty.valid_properties,
-        0,  # Owner in UPRP section always NULL
-        uproperty.hit_point_percent,
-        uproperty.shield_point_percent,
-        uproperty.energy_point_percent,
-        uproperty.resource_amount,
-        uproperty.units_in_hangar,
-        uproperty.flags,
-        0,  # Unknown/unused. Padding?
-      )
-
-    return section("UPRP", b)
+    return SectionPlan(len(properties) * record.size, write)
 
   @property
-  def MRGN(self) -> bytes:
+  def MRGN(self) -> SectionPlan:
     from app.models.entities.location import Location
 
-    b = bytearray()
-
-    locations = [
-      location.data
-      for location in self.map.entities
-      if isinstance(location.data, Location)
-    ]
-
-    for location in locations:
-      b += struct.pack(
-        "<4I2H",
-        location.transform.position.x,
-        location.transform.position.y,
-        location.transform.position.x + location.transform.size.right,
-        location.transform.position.y + location.transform.size.bottom,
-        self.find_string_by_content(location.name).id,
-        location.elevation_flags,
-      )
-
-    # Packing padding, Total size of MRGN section is 5100bytes.
-    while len(b) // struct.calcsize("<4I2H") < 255:
-      b += struct.pack("<4I2H", 0, 0, 0, 0, 0, 0)
+    locations = self.entities.of(Location)
+    record = CHK_STRUCTDICT["MRGN"]
+
+    def write(view: memoryview):
+      for i, location in enumerate(locations):
+        record.pack_into(
+          view,
+          i * record.size,
+          location.transform.position.x,
+          location.transform.position.y,
+          location.transform.position.x + location.transform.size.right,
+          location.transform.position.y + location.transform.size.bottom,
+          self.find_string_by_content(location.name).id,
+          location.elevation_flags,
+        )
 
-    return section("MRGN", b)
+    # Padding records are left zeroed, total size of MRGN section is at least 5100bytes.
+    return SectionPlan(max(len(locations), 255) * record.size, write)
 
   @property
-  def TRIG(self) -> bytes:
-    b = self.map.raw_triggers.raw_data
-    return section("TRIG", b)
+  def TRIG(self) -> SectionPlan:
+    return SectionPlan.copy(self.map.raw_triggers.raw_data)
 
   @property
-  def MBRF(self) -> bytes:
-    b = self.map.raw_mbrf_triggers.raw_data
-    return section("MBRF", b)
+  def MBRF(self) -> SectionPlan:
+    return SectionPlan.copy(self.map.raw_mbrf_triggers.raw_data)
 
   @property
-  def SPRP(self) -> bytes:
-    b = struct.pack(
-      "<2H",
+  def SPRP(self) -> SectionPlan:
+    return packed(
+      CHK_STRUCTDICT["SPRP"],
       self.map.scenario_property.name.id + 1,
       self.map.scenario_property.description.id + 1,
     )
 
-    return section("SPRP", b)
-
   @property
-  def FORC(self) -> bytes:
-    b = struct.pack(
-      "<8B4H4B",
+  def FORC(self) -> SectionPlan:
+    return packed(
+      BUILD_STRUCTDICT["FORC"],
       *[p.force for p in self.map.player[:8]],
       *[self.find_string_by_content(f.name).id + 1 for f in self.map.force],
       *[f.properties for f in self.map.force],
     )
 
-    return section("FORC", b)
-
   @property
-  def COLR(self) -> bytes:
-    b = struct.pack("8B", *[p.color for p in self.map.player[:8]])
-    return section("COLR", b)
+  def COLR(self) -> SectionPlan:
+    return packed(BUILD_STRUCTDICT["COLR"], *[p.color for p in self.map.player[:8]])
 
   @property
-  def PUPx(self) -> bytes:
+  def PUPx(self) -> SectionPlan:
     from app.models.definitions.tech import UpgradeRestriction
 
-    restrictions = [
-      r.data for r in self.map.assets if isinstance(r.data, UpgradeRestriction)
-    ]
-    b = struct.pack(
-      f"{61 * 12}B {61 * 12}B {61 * 2}B {61 * 12}B",
+    restrictions = self.assets.of(UpgradeRestriction)
+    return packed(
+      BUILD_STRUCTDICT["PUPx"],
       *[b for v in restrictions for b in v.player_maximum_level],
       *[b for v in restrictions for b in v.player_minimum_level],
       *[v.default_maximum_level for v in restrictions],
@@ -1067,21 +1156,18 @@ class CHKBuilder:
       *[b for v in restrictions for b in v.uses_default],
     )
 
-    return section("PUPx", b)
-
   @property
-  def UNIx(self) -> bytes:
+  def UNIx(self) -> SectionPlan:
     from app.models.definitions.unit import UnitDefinition
     from app.models.definitions.weapon import WeaponDefinition
-    from eudplib.core.rawtrigger.strdict import DefUnitDict
 
-    units = [u.data for u in self.map.assets if isinstance(u.data, UnitDefinition)]
-    weapons = [w.data for w in self.map.assets if isinstance(w.data, WeaponDefinition)]
+    units = self.assets.of(UnitDefinition)
+    weapons = self.assets.of(WeaponDefinition)
     self.logger.info(f"Attemping to pack {len(units)} units and {len(weapons)} weapons")
     # self.logger.info(f"assets: {self.map.assets}")
 
-    b = struct.pack(
-      f"228B 228I 228H 228B {4 * 228}H {2 * 130}H",
+    return packed(
+      BUILD_STRUCTDICT["UNIx"],
       *[u.use_default for u in units],
       *[u.stats.hit_points.max for u in units],
       *[u.stats.shield_points.max for u in units],
@@ -1091,7 +1177,7 @@ class CHKBuilder:
       *[u.cost.cost.gas for u in units],
       *[
         self.find_string_by_content(u.name).id
-        if not u.use_default and u.name != reverse_tbl_dict(DefUnitDict)[u.id]
+        if not u.use_default and u.name != unit_names()[u.id]
         else 0
         for u in units
       ],
@@ -1100,22 +1186,18 @@ class CHKBuilder:
       *[w.damage.bonus for w in weapons],
     )
 
-    return section("UNIx", b)
-
   @property
-  def TECx(self) -> bytes:
+  def TECx(self) -> SectionPlan:
     from app.models.definitions.tech import Technology
 
-    technologies = [t.data for t in self.map.assets if isinstance(t.data, Technology)]
+    technologies = self.assets.of(Technology)
     self.logger.info(f"Attemping to pack {len(technologies)} technologies")
 
-    b = struct.pack(
-      f"44B {4 * 44}H",
+    return packed(
+      BUILD_STRUCTDICT["TECx"],
       *[t.use_default for t in technologies],
       *[t.cost.mineral for t in technologies],
       *[t.cost.gas for t in technologies],
       *[t.cost.time for t in technologies],
       *[t.cost.energy for t in technologies],
     )
-
-    return section("TECx", b)
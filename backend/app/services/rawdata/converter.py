@@ -1,51 +1,219 @@
-from typing import cast
+from typing import Optional, cast
+from app.models.project import UsemapOptions
 from app.models.components.transform import TransformComponent
 from app.models.definitions.tech import TechCost
 from app.models.structs.cost import Cost
 from app.models.structs.required_and_provided import RequiredAndProvided
 from app.models.structs.spatial import Position2D, RectPosition, Size
 from app.models.structs.stat import Stat
-from app.services.utils.reverse import reverse_tbl_dict
-from .dat import DAT
+from app.services.utils.reverse import (
+  order_names,
+  portrait_names,
+  tech_names,
+  unit_names,
+  upgrade_names,
+  weapon_names,
+)
+from .dat import DAT, get_dat
 from .chk import CHK
-from functools import cached_property
+from functools import cache, cached_property
 
 
-class MapConverter:
-  def __init__(self, dat: DAT, chk: CHK):
+class DATConverter:
+  """
+  Converts DAT-only definitions, which are identical for every map.
+
+  `MapConverter` inherits them, so they can be served once by `/definitions` instead of being
+  repeated in every map.
+  """
+
+  def __init__(self, dat: DAT):
     self.dat = dat
+
+  @cached_property
+  def flingy_definitions(self):
+    from app.models.definitions.flingy import FlingyDefinition
+
+    return [
+      FlingyDefinition(
+        id=id,
+        name=flingy.name,
+        sprite=self.sprite_definitions[flingy.sprite],
+        top_speed=flingy.top_speed,
+        acceleration=flingy.acceleration,
+        halt_distance=flingy.halt_distance,
+        turn_radius=flingy.turn_radius,
+        unused=flingy.unused,
+        move_control=flingy.move_control,
+      )
+      for id, flingy in enumerate(self.dat.flingy)
+    ]
+
+  @cached_property
+  def image_definitions(self):
+    from app.models.definitions.image import ImageDefinition
+
+    return [
+      ImageDefinition(
+        id=id,
+        name=image.name,
+        graphic=image.graphic,
+        turnable=image.turnable,
+        clickable=image.clickable,
+        use_full_iscript=image.use_full_iscript,
+        draw_if_cloaked=image.draw_if_cloaked,
+        draw_function=image.draw_function,
+        remapping=image.remapping,
+        iscript_id=image.iscript_id,
+        shield_overlay=image.shield_overlay,
+        attack_overlay=image.attack_overlay,
+        damage_overlay=image.damage_overlay,
+        special_overlay=image.special_overlay,
+        landing_dust_overlay=image.landing_dust_overlay,
+        lift_off_overlay=image.lift_off_overlay,
+      )
+      for id, image in enumerate(self.dat.images)
+    ]
+
+  @cached_property
+  def sprite_definitions(self):
+    from app.models.definitions.sprite import SpriteDefinition
+
+    return [
+      SpriteDefinition(
+        id=id,
+        name=sprite.name,
+        image=self.image_definitions[sprite.image],
+        health_bar_id=sprite.health_bar,
+        selection_circle_image_id=sprite.selection_circle_image,
+        selection_circle_offset=sprite.selection_circle_offset,
+      )
+      for id, sprite in enumerate(self.dat.sprites)
+    ]
+
+  @cached_property
+  def orders(self):
+    from app.models.definitions.order import OrderDefinition
+
+    return [
+      OrderDefinition(
+        id=id,
+        name=order_names()[id],
+        label=order.label,
+        use_weapon_targeting=order.use_weapon_targeting,
+        can_be_interrupted=order.can_be_interrupted,
+        can_be_queued=order.can_be_queued,
+        targeting=order.targeting,
+        energy=order.energy,
+        animation=order.animation,
+        highlight=order.highlight,
+        obscured_order=order.obscured_order,
+      )
+      for id, order in enumerate(self.dat.orders)
+    ]
+
+  @cached_property
+  def portraits(self):
+    from app.models.definitions.portrait import PortraitDefinition
+
+    return [
+      PortraitDefinition(
+        id=id,
+        name=portrait_names()[id],
+        portrait_file=portrait.portrait_file,
+        smk_change=portrait.smk_change,
+        unknown1=portrait.unknown1,
+      )
+      for id, portrait in enumerate(self.dat.portraits)
+    ]
+
+
+@cache
+def get_dat_converter() -> DATConverter:
+  """
+  Process-wide DAT-only definitions registry, converted once on first use and shared by every
+  `MapConverter` of `get_dat()`. Definitions in it must not be mutated.
+  """
+  return DATConverter(get_dat())
+
+
+class MapConverter(DATConverter):
+  """
+  Converts CHK into `Usemap`. DAT-only definitions come from `get_dat_converter()` when `dat` is
+  `get_dat()`, so they aren't converted again for every map.
+  """
+
+  def __init__(self, dat: DAT, chk: CHK, options: Optional[UsemapOptions] = None):
+    super().__init__(dat)
     self.chk = chk
+    self.options = options or UsemapOptions()
+    self.dat_definitions = (
+      get_dat_converter() if dat is get_dat() else DATConverter(dat)
+    )
+
+  @property
+  def flingy_definitions(self):
+    return self.dat_definitions.flingy_definitions
+
+  @property
+  def image_definitions(self):
+    return self.dat_definitions.image_definitions
+
+  @property
+  def sprite_definitions(self):
+    return self.dat_definitions.sprite_definitions
+
+  @property
+  def orders(self):
+    return self.dat_definitions.orders
+
+  @property
+  def portraits(self):
+    return self.dat_definitions.portraits
 
   @cached_property
   def terrain(self):
-    from app.models.terrain import RawTerrain
+    from app.models.terrain import RawTerrain, RasterLayer
+
+    width, height = self.chk.terrain.size.width, self.chk.terrain.size.height
+    tiles, mask = None, None
+    if self.options.raster:
+      tiles = RasterLayer(
+        dtype="uint16", width=width, height=height, data=self.chk.tiles.to_bytes()
+      )
+      mask = RasterLayer(
+        dtype="uint8", width=width, height=height, data=self.chk.mask.to_bytes()
+      )
 
     return RawTerrain(
-      size=Size(width=self.chk.terrain.size.width, height=self.chk.terrain.size.height),
+      size=Size(width=width, height=height),
       tileset=self.chk.terrain.tileset,
+      tiles=tiles,
+      mask=mask,
     )
 
   @cached_property
   def tiles(self):
     from app.models.entities.tile import Tile
 
+    layer = self.chk.tiles
+    width = layer.width
+    size = RectPosition(left=16, top=16, right=16, bottom=16)
+
     return [
       Tile(
         id=id,
-        group=tile.group,
-        tile_id=tile.id,
+        group=group,
+        tile_id=tile_id,
         transform=TransformComponent(
-          position=Position2D(x=tile.position.x, y=tile.position.y),
-          size=RectPosition(
-            left=16,
-            top=16,
-            right=16,
-            bottom=16,
-          ),
+          position=Position2D(x=id % width, y=id // width),
+          size=size,
         ),
         kind="Tile",
       )
-      for id, tile in enumerate(self.chk.tiles)
+      for id, (group, tile_id) in enumerate(
+        zip(layer.group.ravel().tolist(), layer.subtile.ravel().tolist())
+      )
     ]
 
   @cached_property
@@ -84,23 +252,20 @@ class MapConverter:
   def mask(self):
     from app.models.entities.mask import Mask
 
+    transform = TransformComponent(
+      position=Position2D(x=0, y=0),
+      size=RectPosition(left=16, top=16, right=16, bottom=16),
+    )
+
     return [
       Mask(
         id=id,
         name=f"Mask {id}",
-        transform=TransformComponent(
-          position=Position2D(x=0, y=0),
-          size=RectPosition(
-            left=16,
-            top=16,
-            right=16,
-            bottom=16,
-          ),
-        ),
+        transform=transform,
         kind="Mask",
-        flags=mask.flags,
+        flags=flags,
       )
-      for id, mask in enumerate(self.chk.mask)
+      for id, flags in enumerate(self.chk.mask.raster.ravel().tolist())
     ]
 
   @cached_property
@@ -167,7 +332,7 @@ class MapConverter:
 
     return [
       String(id=id, content=string.content)
-      for id, string in enumerate(self.chk.strings)
+      for id, string in enumerate(self.chk.strings.decode_all())
     ]
 
   @cached_property
@@ -199,6 +364,8 @@ class MapConverter:
   def placed_units(self):
     from app.models.entities.unit import Unit
 
+    normalized = self.options.normalized
+
     return [
       Unit(
         id=id,
@@ -210,7 +377,8 @@ class MapConverter:
         ),
         kind="Unit",
         owner=self.players[unit.owner.id],
-        unit_definition=self.unit_definitions[unit.unit_id],
+        unit_definition=None if normalized else self.unit_definitions[unit.unit_id],
+        definition_id=unit.unit_id,
         # FIXME: Unit Stat(HP, Energy) will not stored only UnitDefinition, need to fix this
         unit_state=unit.unit_state,
         relation_type=unit.relation_type,
@@ -227,17 +395,22 @@ class MapConverter:
   def placed_sprites(self):
     from app.models.entities.sprite import Sprite
 
+    normalized = self.options.normalized
+
+    size = RectPosition(left=100, top=100, right=100, bottom=100)
+
     return [
       Sprite(
         id=id,
         name=self.dat.sprites[id].name,
         transform=TransformComponent(
           position=Position2D(x=sprite.position.x, y=sprite.position.y),
-          size=RectPosition(left=100, top=100, right=100, bottom=100),
+          size=size,
         ),
         kind="Sprite",
         owner=self.players[sprite.owner.id],
-        definition=self.sprite_definitions[sprite.sprite_id],
+        definition=None if normalized else self.sprite_definitions[sprite.sprite_id],
+        definition_id=sprite.sprite_id,
         flags=sprite.flags,
       )
       for id, sprite in enumerate(self.chk.sprites)
@@ -247,6 +420,8 @@ class MapConverter:
   def default_unit_entities(self):
     from app.models.entities.unit import Unit
 
+    normalized = self.options.normalized
+
     return [
       Unit(
         id=id,
@@ -257,7 +432,8 @@ class MapConverter:
         ),
         kind="Unit",
         owner=self.players[0],
-        unit_definition=unit_definition,
+        unit_definition=None if normalized else unit_definition,
+        definition_id=unit_definition.id,
         unit_state=0,
         relation_type=0,
         related_unit=0,
@@ -273,6 +449,8 @@ class MapConverter:
   def default_sprite_entities(self):
     from app.models.entities.sprite import Sprite
 
+    normalized = self.options.normalized
+
     return [
       Sprite(
         id=id,
@@ -288,7 +466,8 @@ class MapConverter:
         ),
         kind="Sprite",
         owner=self.players[0],
-        definition=sprite,
+        definition=None if normalized else sprite,
+        definition_id=sprite.id,
         flags=0,
       )
       for id, sprite in enumerate(self.sprite_definitions)
@@ -301,65 +480,66 @@ class MapConverter:
   @cached_property
   def upgrades(self):
     from app.models.definitions.tech import Upgrade
-    from eudplib.core.rawtrigger.strdict.upgrade import DefUpgradeDict
     from .datdata.scdat import UpgradesDat
 
     return [
       Upgrade(
         id=id,
-        name=reverse_tbl_dict(DefUpgradeDict)[id],
-        use_default=self.chk.upgrade_settings[id].use_default,
+        name=upgrade_names()[id],
+        use_default=setting.use_default,
         base_cost=Cost(
-          mineral=self.chk.upgrade_settings[id].base_cost.mineral,
-          gas=self.chk.upgrade_settings[id].base_cost.gas,
-          time=self.chk.upgrade_settings[id].base_cost.time,
+          mineral=setting.base_cost.mineral,
+          gas=setting.base_cost.gas,
+          time=setting.base_cost.time,
         ),
         factor_cost=Cost(
-          mineral=self.chk.upgrade_settings[id].factor_cost.mineral,
-          gas=self.chk.upgrade_settings[id].factor_cost.gas,
-          time=self.chk.upgrade_settings[id].factor_cost.time,
+          mineral=setting.factor_cost.mineral,
+          gas=setting.factor_cost.gas,
+          time=setting.factor_cost.time,
         ),
         icon=upgrade["icon"],
         label=upgrade["icon"],
         race=upgrade["race"],
       )
-      for id, upgrade in enumerate(UpgradesDat.result)
+      for id, (setting, upgrade) in enumerate(
+        zip(self.chk.upgrade_settings, UpgradesDat.result)
+      )
     ]
 
   @cached_property
   def tech(self):
     from app.models.definitions.tech import Technology
-    from eudplib.core.rawtrigger.strdict.tech import DefTechDict
     from .datdata.scdat import TechdataDat
 
     return [
       Technology(
         id=id,
-        name=reverse_tbl_dict(DefTechDict)[id],
-        use_default=self.chk.technologies[id].use_default,
+        name=tech_names()[id],
+        use_default=technology.use_default,
         cost=TechCost(
-          mineral=self.chk.technologies[id].cost.mineral,
-          gas=self.chk.technologies[id].cost.gas,
-          time=self.chk.technologies[id].cost.time,
-          energy=self.chk.technologies[id].cost.energy,
+          mineral=technology.cost.mineral,
+          gas=technology.cost.gas,
+          time=technology.cost.time,
+          energy=technology.cost.energy,
         ),
         energy_required=bool(tech["energy_required"]),
         icon=tech["icon"],
         label=tech["label"],
         race=tech["race"],
       )
-      for id, tech in enumerate(TechdataDat.result)
+      for id, (technology, tech) in enumerate(
+        zip(self.chk.technologies, TechdataDat.result)
+      )
     ]
 
   @cached_property
   def upgrade_restrictions(self):
     from app.models.definitions.tech import UpgradeRestriction
-    from eudplib.core.rawtrigger.strdict.upgrade import DefUpgradeDict
 
     return [
       UpgradeRestriction(
         id=id,
-        name=reverse_tbl_dict(DefUpgradeDict)[id],
+        name=upgrade_names()[id],
         player_maximum_level=upgrade_restriction.player_maximum_level,
         player_minimum_level=upgrade_restriction.player_minimum_level,
         default_maximum_level=upgrade_restriction.default_maximum_level,
@@ -372,12 +552,11 @@ class MapConverter:
   @cached_property
   def tech_restrictions(self):
     from app.models.definitions.tech import TechRestriction
-    from eudplib.core.rawtrigger.strdict.tech import DefTechDict
 
     return [
       TechRestriction(
         id=id,
-        name=reverse_tbl_dict(DefTechDict)[id],
+        name=tech_names()[id],
         player_availability=tech_restriction.player_availability,
         player_already_researched=tech_restriction.player_already_researched,
         default_availability=tech_restriction.default_availability,
@@ -390,12 +569,11 @@ class MapConverter:
   @cached_property
   def unit_restrictions(self):
     from app.models.definitions.unit import UnitRestriction
-    from eudplib.core.rawtrigger.strdict import DefUnitDict
 
     return [
       UnitRestriction(
         id=id,
-        name=reverse_tbl_dict(DefUnitDict)[id],
+        name=unit_names()[id],
         availability=unit_restriction.availability,
         global_availability=unit_restriction.global_availability,
         uses_defaults=unit_restriction.uses_defaults,
@@ -403,67 +581,6 @@ class MapConverter:
       for id, unit_restriction in enumerate(self.chk.unit_restrictions)
     ]
 
-  @cached_property
-  def flingy_definitions(self):
-    from app.models.definitions.flingy import FlingyDefinition
-
-    return [
-      FlingyDefinition(
-        id=id,
-        name=flingy.name,
-        sprite=self.sprite_definitions[flingy.sprite],
-        top_speed=flingy.top_speed,
-        acceleration=flingy.acceleration,
-        halt_distance=flingy.halt_distance,
-        turn_radius=flingy.turn_radius,
-        unused=flingy.unused,
-        move_control=flingy.move_control,
-      )
-      for id, flingy in enumerate(self.dat.flingy)
-    ]
-
-  @cached_property
-  def image_definitions(self):
-    from app.models.definitions.image import ImageDefinition
-
-    return [
-      ImageDefinition(
-        id=id,
-        name=image.name,
-        graphic=image.graphic,
-        turnable=image.turnable,
-        clickable=image.clickable,
-        use_full_iscript=image.use_full_iscript,
-        draw_if_cloaked=image.draw_if_cloaked,
-        draw_function=image.draw_function,
-        remapping=image.remapping,
-        iscript_id=image.iscript_id,
-        shield_overlay=image.shield_overlay,
-        attack_overlay=image.attack_overlay,
-        damage_overlay=image.damage_overlay,
-        special_overlay=image.special_overlay,
-        landing_dust_overlay=image.landing_dust_overlay,
-        lift_off_overlay=image.lift_off_overlay,
-      )
-      for id, image in enumerate(self.dat.images)
-    ]
-
-  @cached_property
-  def sprite_definitions(self):
-    from app.models.definitions.sprite import SpriteDefinition
-
-    return [
-      SpriteDefinition(
-        id=id,
-        name=sprite.name,
-        image=self.image_definitions[sprite.image],
-        health_bar_id=sprite.health_bar,
-        selection_circle_image_id=sprite.selection_circle_image,
-        selection_circle_offset=sprite.selection_circle_offset,
-      )
-      for id, sprite in enumerate(self.dat.sprites)
-    ]
-
   @cached_property
   def weapon_definitions(self):
     from app.models.definitions.weapon import (
@@ -473,40 +590,41 @@ class MapConverter:
       Splash,
     )
     from .datdata.scdat import WeaponsDat
-    from eudplib.core.rawtrigger.strdict.weapon import DefWeaponDict
 
     return [
       WeaponDefinition(
         id=id,
-        name=reverse_tbl_dict(DefWeaponDict)[id],
+        name=weapon_names()[id],
         damage=Damage(
           amount=weapon_definition.damage.amount,
           bonus=weapon_definition.damage.bonus,
-          factor=WeaponsDat.result[id]["damage_factor"],
+          factor=weapon["damage_factor"],
         ),
         bullet=Bullet(
-          behaviour=WeaponsDat.result[id]["weapon_behavior"],
-          remove_after=WeaponsDat.result[id]["remove_after"],
-          attack_angle=WeaponsDat.result[id]["attack_angle"],
-          launch_spin=WeaponsDat.result[id]["launch_spin"],
-          x_offset=WeaponsDat.result[id]["forward_offset"],
-          y_offset=WeaponsDat.result[id]["upward_offset"],
+          behaviour=weapon["weapon_behavior"],
+          remove_after=weapon["remove_after"],
+          attack_angle=weapon["attack_angle"],
+          launch_spin=weapon["launch_spin"],
+          x_offset=weapon["forward_offset"],
+          y_offset=weapon["upward_offset"],
         ),
         splash=Splash(
-          inner=WeaponsDat.result[id]["inner_splash"],
-          medium=WeaponsDat.result[id]["medium_splash"],
-          outer=WeaponsDat.result[id]["outer_splash"],
+          inner=weapon["inner_splash"],
+          medium=weapon["medium_splash"],
+          outer=weapon["outer_splash"],
         ),
-        cooldown=WeaponsDat.result[id]["weapon_cooldown"],
-        upgrade=WeaponsDat.result[id]["damage_upgrade"],
-        weapon_type=WeaponsDat.result[id]["weapon_type"],
-        explosion_type=WeaponsDat.result[id]["explosion_type"],
-        target_flags=WeaponsDat.result[id]["target_flags"],
-        error_message=WeaponsDat.result[id]["target_error_msg"],
-        icon=WeaponsDat.result[id]["icon"],
-        graphics=WeaponsDat.result[id]["graphics"],
+        cooldown=weapon["weapon_cooldown"],
+        upgrade=weapon["damage_upgrade"],
+        weapon_type=weapon["weapon_type"],
+        explosion_type=weapon["explosion_type"],
+        target_flags=weapon["target_flags"],
+        error_message=weapon["target_error_msg"],
+        icon=weapon["icon"],
+        graphics=weapon["graphics"],
+      )
+      for id, (weapon_definition, weapon) in enumerate(
+        zip(self.chk.weapons, WeaponsDat.result)
       )
-      for id, weapon_definition in enumerate(self.chk.weapons)
     ]
 
   @cached_property
@@ -530,72 +648,72 @@ class MapConverter:
         use_default=unit_definition.use_default,
         specification=UnitSpecification(
           name="Unit Specification",
-          graphics=self.flingy_definitions[UnitsDat.result[id]["graphics"]],
-          subunit1=UnitsDat.result[id]["subunit1"],
-          subunit2=UnitsDat.result[id]["subunit2"],
-          infestation=UnitsDat.result[id]["infestation"] if 106 <= id <= 201 else None,
-          construction_animation=UnitsDat.result[id]["construction_animation"],
-          unit_direction=UnitsDat.result[id]["unit_direction"],
-          portrait=UnitsDat.result[id]["portrait"],
+          graphics=self.flingy_definitions[unit["graphics"]],
+          subunit1=unit["subunit1"],
+          subunit2=unit["subunit2"],
+          infestation=unit["infestation"] if 106 <= id <= 201 else None,
+          construction_animation=unit["construction_animation"],
+          unit_direction=unit["unit_direction"],
+          portrait=unit["portrait"],
           label=0,
         ),
         stats=UnitStatus(
           name="Unit Status",
           hit_points=Stat(
-            current=self.chk.unit_definitions[id].stat.hit_points,
-            max=self.chk.unit_definitions[id].stat.hit_points,
+            current=unit_definition.stat.hit_points,
+            max=unit_definition.stat.hit_points,
           ),
           shield_points=Stat(
-            current=self.chk.unit_definitions[id].stat.shield_points,
-            max=self.chk.unit_definitions[id].stat.shield_points,
+            current=unit_definition.stat.shield_points,
+            max=unit_definition.stat.shield_points,
           ),
-          shield_enable=cast(bool, UnitsDat.result[id]["shield_enable"]),
+          shield_enable=cast(bool, unit["shield_enable"]),
           energy_points=Stat(
-            current=self.chk.unit_definitions[id].stat.energy_points or 0,
-            max=self.chk.unit_definitions[id].stat.energy_points or 0,
+            current=unit_definition.stat.energy_points or 0,
+            max=unit_definition.stat.energy_points or 0,
           ),
-          armor_points=self.chk.unit_definitions[id].stat.armor_points or 0,
-          armor_upgrade=UnitsDat.result[id]["armor_upgrade"],
-          rank=UnitsDat.result[id]["rank"],
-          elevation_level=UnitsDat.result[id]["elevation_level"],
+          armor_points=unit_definition.stat.armor_points or 0,
+          armor_upgrade=unit["armor_upgrade"],
+          rank=unit["rank"],
+          elevation_level=unit["elevation_level"],
         ),
         weapons=UnitWeapon(
-          ground_weapon=self.weapon_definitions[UnitsDat.result[id]["ground_weapon"]]
-          if UnitsDat.result[id]["ground_weapon"] < 130
+          ground_weapon=self.weapon_definitions[unit["ground_weapon"]]
+          if unit["ground_weapon"] < 130
           else None,
-          air_weapon=self.weapon_definitions[UnitsDat.result[id]["air_weapon"]]
-          if UnitsDat.result[id]["air_weapon"] < 130
+          air_weapon=self.weapon_definitions[unit["air_weapon"]]
+          if unit["air_weapon"] < 130
           else None,
-          max_ground_hits=UnitsDat.result[id]["max_ground_hits"],
-          max_air_hits=UnitsDat.result[id]["max_air_hits"],
-          target_acquisition_range=UnitsDat.result[id]["target_acquisition_range"],
-          sight_range=UnitsDat.result[id]["sight_range"],
-          special_ability_flags=UnitsDat.result[id]["special_ability_flags"],
+          max_ground_hits=unit["max_ground_hits"],
+          max_air_hits=unit["max_air_hits"],
+          target_acquisition_range=unit["target_acquisition_range"],
+          sight_range=unit["sight_range"],
+          special_ability_flags=unit["special_ability_flags"],
         ),
         sound=UnitSound(
-          ready=UnitsDat.result[id]["ready_sound"] if id <= 105 else None,
-          what_start=UnitsDat.result[id]["what_sound_start"],
-          what_end=UnitsDat.result[id]["what_sound_end"],
-          piss_start=UnitsDat.result[id]["piss_sound_start"] if id <= 105 else None,
-          piss_end=UnitsDat.result[id]["piss_sound_end"] if id <= 105 else None,
-          yes_start=UnitsDat.result[id]["yes_sound_start"] if id <= 105 else None,
-          yes_end=UnitsDat.result[id]["yes_sound_end"] if id <= 105 else None,
+          ready=unit["ready_sound"] if id <= 105 else None,
+          what_start=unit["what_sound_start"],
+          what_end=unit["what_sound_end"],
+          piss_start=unit["piss_sound_start"] if id <= 105 else None,
+          piss_end=unit["piss_sound_end"] if id <= 105 else None,
+          yes_start=unit["yes_sound_start"] if id <= 105 else None,
+          yes_end=unit["yes_sound_end"] if id <= 105 else None,
         ),
         size=UnitSize(
-          size_type=UnitsDat.result[id]["unit_size"],
+          size_type=unit["unit_size"],
           placement_box_size=Size(
-            height=UnitsDat.result[id]["placement_box_height"],
-            width=UnitsDat.result[id]["placement_box_width"],
+            height=unit["placement_box_height"],
+            width=unit["placement_box_width"],
           ),
           bounds=RectPosition(
-            left=UnitsDat.result[id]["size_left"],
-            right=UnitsDat.result[id]["size_right"],
-            top=UnitsDat.result[id]["size_up"],
-            bottom=UnitsDat.result[id]["size_down"],
+            left=unit["size_left"],
+            right=unit["size_right"],
+            top=unit["size_up"],
+            bottom=unit["size_down"],
           ),
           addon_position=Position2D(
-            x=cast(int, UnitsDat.result[id]["addon_horizontal"]),
-            y=cast(int, UnitsDat.result[id]["addon_vertical"]),
+            x=cast(int, unit["addon_horizontal"]),
+            y=cast(int, unit["addon_vertical"]),
           )
           if 106 <= id <= 201
           else None,
@@ -606,65 +724,29 @@ class MapConverter:
             gas=unit_definition.cost.gas,
             time=unit_definition.cost.time,
           ),
-          build_score=UnitsDat.result[id]["build_score"],
-          destroy_score=UnitsDat.result[id]["destroy_score"],
-          is_broodwar=cast(bool, UnitsDat.result[id]["broodwar_unit_flag"]),
+          build_score=unit["build_score"],
+          destroy_score=unit["destroy_score"],
+          is_broodwar=cast(bool, unit["broodwar_unit_flag"]),
           supply=RequiredAndProvided(
-            required=UnitsDat.result[id]["supply_required"],
-            provided=UnitsDat.result[id]["supply_provided"],
+            required=unit["supply_required"],
+            provided=unit["supply_provided"],
           ),
           space=RequiredAndProvided(
-            required=UnitsDat.result[id]["space_required"],
-            provided=UnitsDat.result[id]["space_provided"],
+            required=unit["space_required"],
+            provided=unit["space_provided"],
           ),
         ),
         ai=UnitAI(
-          computer_idle=UnitsDat.result[id]["comp_ai_idle"],
-          human_idle=UnitsDat.result[id]["human_ai_idle"],
-          return_to_idle=UnitsDat.result[id]["return_to_idle"],
-          attack_and_move=UnitsDat.result[id]["attack_move"],
-          internal=UnitsDat.result[id]["ai_internal"],
-          right_click=UnitsDat.result[id]["right_click_action"],
-          attack_unit=UnitsDat.result[id]["attack_unit"],
+          computer_idle=unit["comp_ai_idle"],
+          human_idle=unit["human_ai_idle"],
+          return_to_idle=unit["return_to_idle"],
+          attack_and_move=unit["attack_move"],
+          internal=unit["ai_internal"],
+          right_click=unit["right_click_action"],
+          attack_unit=unit["attack_unit"],
         ),
       )
-      for id, unit_definition in enumerate(self.chk.unit_definitions)
-    ]
-
-  @cached_property
-  def orders(self):
-    from app.models.definitions.order import OrderDefinition
-    from eudplib.core.rawtrigger.strdict.unitorder import DefUnitOrderDict
-
-    return [
-      OrderDefinition(
-        id=id,
-        name=reverse_tbl_dict(DefUnitOrderDict)[id],
-        label=order.label,
-        use_weapon_targeting=order.use_weapon_targeting,
-        can_be_interrupted=order.can_be_interrupted,
-        can_be_queued=order.can_be_queued,
-        targeting=order.targeting,
-        energy=order.energy,
-        animation=order.animation,
-        highlight=order.highlight,
-        obscured_order=order.obscured_order,
-      )
-      for id, order in enumerate(self.dat.orders)
-    ]
-
-  @cached_property
-  def portraits(self):
-    from app.models.definitions.portrait import PortraitDefinition
-    from eudplib.core.rawtrigger.strdict.portrait import DefPortraitDict
-
-    return [
-      PortraitDefinition(
-        id=id,
-        name=reverse_tbl_dict(DefPortraitDict)[id],
-        portrait_file=portrait.portrait_file,
-        smk_change=portrait.smk_change,
-        unknown1=portrait.unknown1,
+      for id, (unit_definition, unit) in enumerate(
+        zip(self.chk.unit_definitions, UnitsDat.result)
       )
-      for id, portrait in enumerate(self.dat.portraits)
     ]
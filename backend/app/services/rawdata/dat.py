@@ -1,23 +1,30 @@
-from ..utils.reverse import reverse_tbl_dict
+from ..utils.reverse import (
+  flingy_names,
+  image_names,
+  order_names,
+  portrait_names,
+  sprite_names,
+)
 from .datdata import ImagesDat, FlingyDat, OrdersDat, PortdataDat, SpritesDat
 from app.types import dat_types
+from functools import cache, cached_property
 
 
 class DAT:
   """
   DAT is a class that contains necessary data from the DAT file.
-  """
 
-  @property
-  def images(self) -> list[dat_types.Image]:
-    from eudplib.core.rawtrigger.strdict.image import DefImageDict
+  Every table is built once per instance. Use `get_dat()` to share one instance in a process.
+  """
 
+  @cached_property
+  def images(self) -> tuple[dat_types.Image, ...]:
     result: list[dat_types.Image] = []
     for id, image in enumerate(ImagesDat.result):
       result.append(
         dat_types.Image(
           id=id,
-          name=reverse_tbl_dict(DefImageDict)[id],
+          name=image_names()[id],
           graphic=image["grp_id"],
           turnable=image["turnable"],
           clickable=image["clickable"],
@@ -35,18 +42,16 @@ class DAT:
         )
       )
 
-    return result
-
-  @property
-  def flingy(self) -> list[dat_types.Flingy]:
-    from eudplib.core.rawtrigger.strdict.flingy import DefFlingyDict
+    return tuple(result)
 
+  @cached_property
+  def flingy(self) -> tuple[dat_types.Flingy, ...]:
     result: list[dat_types.Flingy] = []
     for id, flingy in enumerate(FlingyDat.result):
       result.append(
         dat_types.Flingy(
           id=id,
-          name=reverse_tbl_dict(DefFlingyDict)[id],
+          name=flingy_names()[id],
           sprite=flingy["sprite"],
           top_speed=flingy["topSpeed"],
           acceleration=flingy["acceleration"],
@@ -57,18 +62,16 @@ class DAT:
         )
       )
 
-    return result
-
-  @property
-  def orders(self) -> list[dat_types.Order]:
-    from eudplib.core.rawtrigger.strdict.unitorder import DefUnitOrderDict
+    return tuple(result)
 
+  @cached_property
+  def orders(self) -> tuple[dat_types.Order, ...]:
     result: list[dat_types.Order] = []
     for id, order in enumerate(OrdersDat.result):
       result.append(
         dat_types.Order(
           id=id,
-          name=reverse_tbl_dict(DefUnitOrderDict)[id],
+          name=order_names()[id],
           label=order["label"],
           use_weapon_targeting=order["use_weapon_targeting"],
           can_be_interrupted=order["can_be_interrupted"],
@@ -81,36 +84,32 @@ class DAT:
         )
       )
 
-    return result
-
-  @property
-  def portraits(self) -> list[dat_types.Portrait]:
-    from eudplib.core.rawtrigger.strdict.portrait import DefPortraitDict
+    return tuple(result)
 
+  @cached_property
+  def portraits(self) -> tuple[dat_types.Portrait, ...]:
     result: list[dat_types.Portrait] = []
     for id, portrait in enumerate(PortdataDat.result):
       result.append(
         dat_types.Portrait(
           id=id,
-          name=reverse_tbl_dict(DefPortraitDict)[id],
+          name=portrait_names()[id],
           portrait_file=portrait["portrait_file"],
           smk_change=portrait["smk_change"],
           unknown1=portrait["unknown1"],
         )
       )
 
-    return result
-
-  @property
-  def sprites(self) -> list[dat_types.Sprite]:
-    from eudplib.core.rawtrigger.strdict.sprite import DefSpriteDict
+    return tuple(result)
 
+  @cached_property
+  def sprites(self) -> tuple[dat_types.Sprite, ...]:
     result: list[dat_types.Sprite] = []
     for id, sprite in enumerate(SpritesDat.result):
       result.append(
         dat_types.Sprite(
           id=id,
-          name=reverse_tbl_dict(DefSpriteDict)[id],
+          name=sprite_names()[id],
           owner=0,
           flags=0,
           image=sprite["image_file"],
@@ -124,4 +123,10 @@ class DAT:
         )
       )
 
-    return result
+    return tuple(result)
+
+
+@cache
+def get_dat() -> DAT:
+  """Process-wide `DAT`. DAT files never change at runtime, so every request shares it."""
+  return DAT()
@@ -1,7 +1,17 @@
 from functools import cached_property
 import struct
-from typing import Callable, Literal, Optional, TypeVar, Generic, TypedDict, cast
+from typing import (
+  Callable,
+  Literal,
+  NamedTuple,
+  Optional,
+  TypeVar,
+  Generic,
+  TypedDict,
+  cast,
+)
 from pathlib import Path
+import numpy as np
 
 T = TypeVar("T")
 DatFiles = Literal[
@@ -20,6 +30,13 @@ DatFiles = Literal[
 
 
 class DAT(Generic[T]):
+  """
+  DAT file decoded column by column.
+
+  DAT files store each field of every entry contiguously, so every field is decoded as one
+  column in one shot. `result` is row views of them.
+  """
+
   format: str
   binary_data: bytes
   fname: DatFiles
@@ -46,27 +63,97 @@ class DAT(Generic[T]):
     except Exception as e:
       raise RuntimeError(f"Cannot read raw dat file {self.fname}.dat. Detail: {str(e)}")
 
+  def read_column(
+    self, offset: int, fmt: str, count: int, stride: Optional[int] = None, bias: int = 0
+  ) -> list[int]:
+    """Decode `count` values of `fmt` at every `stride` bytes from `offset` at once."""
+    dtype = np.dtype("<" + fmt)
+    column = np.ndarray(
+      (count,),
+      dtype=dtype,
+      buffer=self.binary_data,
+      offset=offset,
+      strides=(stride or dtype.itemsize,),
+    )
+    if bias:
+      column = column.astype(np.int64) + bias
+
+    return column.tolist()
+
+  def decode_columns(self) -> dict[str, list]:
+    columns: dict[str, list] = {}
+    offset = 0
+
+    for index, fmt in enumerate(self.field_formats):
+      columns[str(index)] = self.read_column(offset, fmt, self.entry_count)
+      offset += struct.calcsize(fmt) * self.entry_count
+
+    return columns
+
+  @cached_property
+  def columns(self) -> dict[str, list]:
+    """
+    Decoded fields, each of them has `entry_count` values. Fields without names are keyed by
+    their position.
+    """
+    return self.decode_columns()
+
+  def row(self, id: int) -> T:
+    return self.parse_entry(tuple(column[id] for column in self.columns.values()))
+
   @cached_property
   def result(self) -> tuple[T, ...]:
-    offset = 0
-    fields = []
-
-    for fmt in self.field_formats:
-      size = struct.calcsize(fmt)
-      field = [
-        struct.unpack(
-          "<" + fmt, self.binary_data[offset + i * size : offset + (i + 1) * size]
-        )[0]
-        for i in range(self.entry_count)
-      ]
-      fields.append(field)
-      offset += size * self.entry_count
-
-    return tuple(
-      self.parse_entry(tuple(field[i] for field in fields))
-      for i in range(self.entry_count)
+    return tuple(map(self.parse_entry, zip(*self.columns.values())))
+
+
+class Field(NamedTuple):
+  """Named DAT field. Only entries from `start` to `start + count` have it."""
+
+  name: str
+  offset: int
+  fmt: str
+  count: Optional[int] = None
+  start: int = 0
+  stride: Optional[int] = None
+  bias: int = 0
+
+
+class FieldsDAT(DAT[T]):
+  """DAT file described by `Field`s, for files whose fields don't cover every entry."""
+
+  def __init__(self, fname: DatFiles, *, entry_count: int, fields: list[Field]):
+    self.fname = fname
+    self.entry_count = entry_count
+    self.fields = fields
+    self.binary_data = self.read_rawfile()
+
+  def decode_columns(self) -> dict[str, list]:
+    columns: dict[str, list] = {}
+
+    for field in self.fields:
+      count = self.entry_count if field.count is None else field.count
+      values = self.read_column(
+        field.offset, field.fmt, count, field.stride, field.bias
+      )
+      padding = self.entry_count - field.start - count
+      columns[field.name] = [None] * field.start + values + [None] * padding
+
+    return columns
+
+  def row(self, id: int) -> T:
+    return cast(
+      T,
+      {
+        name: column[id]
+        for name, column in self.columns.items()
+        if column[id] is not None
+      },
     )
 
+  @cached_property
+  def result(self) -> tuple[T, ...]:
+    return tuple(self.row(id) for id in range(self.entry_count))
+
 
 class Flingy(TypedDict):
   sprite: int
@@ -233,63 +320,18 @@ class Sprite(TypedDict):
   selection_circle_offset: Optional[int]
 
 
-class SpritesDatFile(DAT[Sprite]):
-  def __init__(self):
-    self.fname = "sprites"
-    self.entry_count = 517
-    self.binary_data = self.read_rawfile()
-
-  def read_field(
-    self,
-    offset: int,
-    fmt: str,
-    count: int,
-    stride: Optional[int] = None,
-    index_offset: int = 0,
-  ) -> list:
-    size = struct.calcsize(fmt)
-    if stride is None:
-      stride = size
-    return [
-      struct.unpack(
-        "<" + fmt,
-        self.binary_data[
-          offset + (i - index_offset) * stride : offset
-          + (i - index_offset) * stride
-          + size
-        ],
-      )[0]
-      for i in range(index_offset, index_offset + count)
-    ]
-
-  @cached_property
-  def result(self) -> tuple[Sprite, ...]:
-    s = [{} for _ in range(self.entry_count)]
-
-    def set_range(name, values, start=0):
-      for i, v in enumerate(values):
-        s[start + i][name] = v
-
-    set_range("image_file", self.read_field(0x000, "H", 517))
-    set_range(
-      "health_bar", self.read_field(0x40A, "B", 387, index_offset=130), start=130
-    )
-    set_range("unknown2", self.read_field(0x58D, "B", 517))
-    set_range("is_visible", self.read_field(0x792, "B", 517))
-
-    raw = self.read_field(0x997, "B", 387, index_offset=130)
-    adjusted = [v + 561 for v in raw]
-    set_range("selection_circle_image", adjusted, start=130)
-    set_range(
-      "selection_circle_offset",
-      self.read_field(0xB1A, "B", 387, index_offset=130),
-      start=130,
-    )
-
-    return tuple(cast(Sprite, entry) for entry in s)
-
-
-SpritesDat = SpritesDatFile()
+SpritesDat = FieldsDAT[Sprite](
+  "sprites",
+  entry_count=517,
+  fields=[
+    Field("image_file", 0x000, "H"),
+    Field("health_bar", 0x40A, "B", count=387, start=130),
+    Field("unknown2", 0x58D, "B"),
+    Field("is_visible", 0x792, "B"),
+    Field("selection_circle_image", 0x997, "B", count=387, start=130, bias=561),
+    Field("selection_circle_offset", 0xB1A, "B", count=387, start=130),
+  ],
+)
 
 
 class Techdata(TypedDict):
@@ -394,145 +436,73 @@ class Unit(TypedDict):
   availability_flags: int
 
 
-class UnitsDatFile(DAT[Unit]):
-  """Unlike other .dat files, units.dat parsing logic is special.
-
-  Some properties(Infestation, PissSoundStart, PissSoundStart) is valid on some ID, spatial data
-  need to structuring.
-  """
-
-  def __init__(self):
-    self.fname = "units"
-    self.entry_count = 228
-    self.binary_data = self.read_rawfile()
-
-  def read_field(
-    self,
-    offset: int,
-    fmt: str,
-    count: int,
-    stride: Optional[int] = None,
-    index_offset: int = 0,
-  ) -> list:
-    size = struct.calcsize(fmt)
-    if stride is None:
-      stride = size
-    return [
-      struct.unpack(
-        "<" + fmt,
-        self.binary_data[
-          offset + (i - index_offset) * stride : offset
-          + (i - index_offset) * stride
-          + size
-        ],
-      )[0]
-      for i in range(index_offset, index_offset + count)
-    ]
-
-  @cached_property
-  def result(self) -> tuple[Unit, ...]:
-    u = [{} for _ in range(self.entry_count)]
-
-    def set_range(name, values, start=0):
-      for i, v in enumerate(values):
-        u[start + i][name] = v
-
-    # Example subset of fields
-    set_range("graphics", self.read_field(0x0000, "B", 228))
-    set_range("subunit1", self.read_field(0x00E4, "H", 228))
-    set_range("subunit2", self.read_field(0x02AC, "H", 228))
-
-    # Conditional field example (unit id 106 ~ 201)
-    infestation = self.read_field(0x0474, "H", 96, stride=2, index_offset=106)
-    for i, val in enumerate(infestation):
-      u[106 + i]["infestation"] = val
-
-    set_range("construction_animation", self.read_field(0x0534, "I", 228))
-    set_range("unit_direction", self.read_field(0x08C4, "B", 228))
-    set_range("shield_enable", self.read_field(0x09A8, "B", 228))
-    set_range("shield_amount", self.read_field(0x0A8C, "H", 228))
-    set_range("hit_points", self.read_field(0x0C54, "I", 228))
-    set_range("elevation_level", self.read_field(0x0FE4, "B", 228))
-    set_range("old_movement_flags", self.read_field(0x10C8, "B", 228))
-    set_range("rank", self.read_field(0x11AC, "B", 228))
-    set_range("comp_ai_idle", self.read_field(0x1290, "B", 228))
-    set_range("human_ai_idle", self.read_field(0x1374, "B", 228))
-    set_range("return_to_idle", self.read_field(0x1458, "B", 228))
-    set_range("attack_unit", self.read_field(0x153C, "B", 228))
-    set_range("attack_move", self.read_field(0x1620, "B", 228))
-    set_range("ground_weapon", self.read_field(0x1704, "B", 228))
-    set_range("max_ground_hits", self.read_field(0x17E8, "B", 228))
-    set_range("air_weapon", self.read_field(0x18CC, "B", 228))
-    set_range("max_air_hits", self.read_field(0x19B0, "B", 228))
-    set_range("ai_internal", self.read_field(0x1A94, "B", 228))
-    set_range("special_ability_flags", self.read_field(0x1B78, "I", 228))
-    set_range("target_acquisition_range", self.read_field(0x1F08, "B", 228))
-    set_range("sight_range", self.read_field(0x1FEC, "B", 228))
-    set_range("armor_upgrade", self.read_field(0x20D0, "B", 228))
-    set_range("unit_size", self.read_field(0x21B4, "B", 228))
-    set_range("armor", self.read_field(0x2298, "B", 228))
-    set_range("right_click_action", self.read_field(0x237C, "B", 228))
-    ready_sound = self.read_field(0x2460, "H", 106, stride=2)
-    for i, val in enumerate(ready_sound):
-      u[i]["ready_sound"] = val
-    set_range("what_sound_start", self.read_field(0x2534, "H", 228))
-    set_range("what_sound_end", self.read_field(0x26FC, "H", 228))
-    piss_start = self.read_field(0x28C4, "H", 106, stride=2)
-    for i, val in enumerate(piss_start):
-      u[i]["piss_sound_start"] = val
-    piss_end = self.read_field(0x2998, "H", 106, stride=2)
-    for i, val in enumerate(piss_end):
-      u[i]["piss_sound_end"] = val
-    yes_start = self.read_field(0x2A6C, "H", 106, stride=2)
-    for i, val in enumerate(yes_start):
-      u[i]["yes_sound_start"] = val
-    yes_end = self.read_field(0x2B40, "H", 106, stride=2)
-    for i, val in enumerate(yes_end):
-      u[i]["yes_sound_end"] = val
-
-    # Interleaved example: placement box
-    for i in range(228):
-      base = 0x2C14 + i * 4
-      u[i]["placement_box_width"] = struct.unpack(
-        "<H", self.binary_data[base : base + 2]
-      )[0]
-      u[i]["placement_box_height"] = struct.unpack(
-        "<H", self.binary_data[base + 2 : base + 4]
-      )[0]
-
-    addon_h = self.read_field(0x2FA4, "H", 96, stride=2, index_offset=106)
-    for i, val in enumerate(addon_h):
-      u[106 + i]["addon_horizontal"] = val
-    addon_v = self.read_field(0x3064, "H", 96, stride=2, index_offset=106)
-    for i, val in enumerate(addon_v):
-      u[106 + i]["addon_vertical"] = val
-
-    for i in range(228):
-      base = 0x3124 + i * 8
-      u[i]["size_left"] = struct.unpack("<H", self.binary_data[base + 0 : base + 2])[0]
-      u[i]["size_up"] = struct.unpack("<H", self.binary_data[base + 2 : base + 4])[0]
-      u[i]["size_right"] = struct.unpack("<H", self.binary_data[base + 4 : base + 6])[0]
-      u[i]["size_down"] = struct.unpack("<H", self.binary_data[base + 6 : base + 8])[0]
-
-    set_range("portrait", self.read_field(0x3844, "H", 228))
-    set_range("mineral_cost", self.read_field(0x3A0C, "H", 228))
-    set_range("vespene_cost", self.read_field(0x3BD4, "H", 228))
-    set_range("build_time", self.read_field(0x3D9C, "H", 228))
-    set_range("unknown1", self.read_field(0x3F64, "H", 228))
-    set_range("staredit_group_flags", self.read_field(0x412C, "B", 228))
-    set_range("supply_provided", self.read_field(0x4210, "B", 228))
-    set_range("supply_required", self.read_field(0x42F4, "B", 228))
-    set_range("space_required", self.read_field(0x43D8, "B", 228))
-    set_range("space_provided", self.read_field(0x44BC, "B", 228))
-    set_range("build_score", self.read_field(0x45A0, "H", 228))
-    set_range("destroy_score", self.read_field(0x4768, "H", 228))
-    set_range("unit_map_string", self.read_field(0x4930, "H", 228))
-    set_range("broodwar_unit_flag", self.read_field(0x4AF8, "B", 228))
-    set_range("availability_flags", self.read_field(0x4BDC, "H", 228))
-    return tuple(cast(Unit, entry) for entry in u)
-
-
-UnitsDat = UnitsDatFile()
+# Unlike other .dat files, some units.dat properties(Infestation, PissSoundStart, ...) are
+# valid on some IDs only, and placement box and size are interleaved.
+UnitsDat = FieldsDAT[Unit](
+  "units",
+  entry_count=228,
+  fields=[
+    Field("graphics", 0x0000, "B"),
+    Field("subunit1", 0x00E4, "H"),
+    Field("subunit2", 0x02AC, "H"),
+    Field("infestation", 0x0474, "H", count=96, start=106),
+    Field("construction_animation", 0x0534, "I"),
+    Field("unit_direction", 0x08C4, "B"),
+    Field("shield_enable", 0x09A8, "B"),
+    Field("shield_amount", 0x0A8C, "H"),
+    Field("hit_points", 0x0C54, "I"),
+    Field("elevation_level", 0x0FE4, "B"),
+    Field("old_movement_flags", 0x10C8, "B"),
+    Field("rank", 0x11AC, "B"),
+    Field("comp_ai_idle", 0x1290, "B"),
+    Field("human_ai_idle", 0x1374, "B"),
+    Field("return_to_idle", 0x1458, "B"),
+    Field("attack_unit", 0x153C, "B"),
+    Field("attack_move", 0x1620, "B"),
+    Field("ground_weapon", 0x1704, "B"),
+    Field("max_ground_hits", 0x17E8, "B"),
+    Field("air_weapon", 0x18CC, "B"),
+    Field("max_air_hits", 0x19B0, "B"),
+    Field("ai_internal", 0x1A94, "B"),
+    Field("special_ability_flags", 0x1B78, "I"),
+    Field("target_acquisition_range", 0x1F08, "B"),
+    Field("sight_range", 0x1FEC, "B"),
+    Field("armor_upgrade", 0x20D0, "B"),
+    Field("unit_size", 0x21B4, "B"),
+    Field("armor", 0x2298, "B"),
+    Field("right_click_action", 0x237C, "B"),
+    Field("ready_sound", 0x2460, "H", count=106),
+    Field("what_sound_start", 0x2534, "H"),
+    Field("what_sound_end", 0x26FC, "H"),
+    Field("piss_sound_start", 0x28C4, "H", count=106),
+    Field("piss_sound_end", 0x2998, "H", count=106),
+    Field("yes_sound_start", 0x2A6C, "H", count=106),
+    Field("yes_sound_end", 0x2B40, "H", count=106),
+    Field("placement_box_width", 0x2C14, "H", stride=4),
+    Field("placement_box_height", 0x2C16, "H", stride=4),
+    Field("addon_horizontal", 0x2FA4, "H", count=96, start=106),
+    Field("addon_vertical", 0x3064, "H", count=96, start=106),
+    Field("size_left", 0x3124, "H", stride=8),
+    Field("size_up", 0x3126, "H", stride=8),
+    Field("size_right", 0x3128, "H", stride=8),
+    Field("size_down", 0x312A, "H", stride=8),
+    Field("portrait", 0x3844, "H"),
+    Field("mineral_cost", 0x3A0C, "H"),
+    Field("vespene_cost", 0x3BD4, "H"),
+    Field("build_time", 0x3D9C, "H"),
+    Field("unknown1", 0x3F64, "H"),
+    Field("staredit_group_flags", 0x412C, "B"),
+    Field("supply_provided", 0x4210, "B"),
+    Field("supply_required", 0x42F4, "B"),
+    Field("space_required", 0x43D8, "B"),
+    Field("space_provided", 0x44BC, "B"),
+    Field("build_score", 0x45A0, "H"),
+    Field("destroy_score", 0x4768, "H"),
+    Field("unit_map_string", 0x4930, "H"),
+    Field("broodwar_unit_flag", 0x4AF8, "B"),
+    Field("availability_flags", 0x4BDC, "H"),
+  ],
+)
 
 
 class Upgrade(TypedDict):
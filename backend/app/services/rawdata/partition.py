@@ -0,0 +1,32 @@
+from typing import Iterable, TypeVar
+from app.models.asset import Asset
+
+T = TypeVar("T")
+
+
+class TypePartition:
+  """
+  `Asset.data` grouped by exact type in one pass.
+
+  CHK sections take their own type from it instead of scanning every asset with `isinstance`
+  again. Items keep their original order within a type.
+  """
+
+  def __init__(self, assets: Iterable[Asset]):
+    self.partitions: dict[type, list] = {}
+
+    for asset in assets:
+      if asset.data is None:
+        continue
+
+      partition = self.partitions.get(type(asset.data))
+      if partition is None:
+        partition = self.partitions[type(asset.data)] = []
+      partition.append(asset.data)
+
+  def of(self, kind: type[T]) -> list[T]:
+    """Every `Asset.data` whose type is exactly `kind`. Models of CHK sections aren't subclassed."""
+    return self.partitions.get(kind, [])
+
+  def __len__(self) -> int:
+    return sum(map(len, self.partitions.values()))
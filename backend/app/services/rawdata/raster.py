@@ -0,0 +1,165 @@
+from typing import Iterator
+from app.types import chk_types, spatial
+import numpy as np
+
+
+class TileLayer:
+  """
+  MTXM tile layer backed by a single `uint16` raster.
+
+  Each cell packs the tile group in the upper 12 bits and the subtile in the lower 4 bits, so
+  both are decoded for the whole map at once. `chk_types.Tile` objects are only created when a
+  cell is accessed.
+  """
+
+  def __init__(self, raster: np.ndarray):
+    if raster.ndim != 2:
+      raise ValueError(
+        f"Tile raster must be 2-dimensional, got {raster.ndim} dimensions."
+      )
+
+    self.raster = raster.astype(np.uint16, copy=False)
+
+  @classmethod
+  def from_bytes(cls, data: bytes | memoryview, width: int, height: int) -> "TileLayer":
+    """Decode MTXM section bytes.
+
+    MTXM can be shorter or longer than `width * height` cells, missing cells are filled with
+    tile 0 and trailing cells are ignored.
+    """
+    count = min(len(data) // 2, width * height)
+    values = np.frombuffer(data, dtype="<u2", count=count)
+    raster = np.zeros(width * height, dtype=np.uint16)
+    raster[:count] = values
+
+    return cls(raster.reshape(height, width))
+
+  @property
+  def width(self) -> int:
+    return self.raster.shape[1]
+
+  @property
+  def height(self) -> int:
+    return self.raster.shape[0]
+
+  @property
+  def group(self) -> np.ndarray:
+    """Tile group of every cell, shaped `(height, width)`."""
+    return self.raster >> 4
+
+  @property
+  def subtile(self) -> np.ndarray:
+    """Subtile index of every cell, shaped `(height, width)`."""
+    return self.raster & 0xF
+
+  def tile(self, x: int, y: int) -> chk_types.Tile:
+    value = int(self.raster[y, x])
+    return chk_types.Tile(
+      group=value >> 4, id=value & 0xF, position=spatial.Position(x=x, y=y)
+    )
+
+  def to_bytes(self) -> bytes:
+    return self.raster.astype("<u2", copy=False).tobytes()
+
+  def __len__(self) -> int:
+    return self.raster.size
+
+  def __getitem__(self, index: int) -> chk_types.Tile:
+    if index < 0:
+      index += len(self)
+    if not 0 <= index < len(self):
+      raise IndexError("Tile index out of range")
+
+    y, x = divmod(index, self.width)
+    return self.tile(x, y)
+
+  def __iter__(self) -> Iterator[chk_types.Tile]:
+    for index in range(len(self)):
+      yield self[index]
+
+
+class MaskLayer:
+  """
+  MASK (fog of war) layer backed by a single `uint8` raster.
+
+  Bit `n` of a cell is set when player `n + 1` has the cell fogged. The per-player flags are
+  available as bit-plane arrays, `chk_types.Mask` objects are only created when a cell is
+  accessed.
+  """
+
+  def __init__(self, raster: np.ndarray):
+    if raster.ndim != 2:
+      raise ValueError(
+        f"Mask raster must be 2-dimensional, got {raster.ndim} dimensions."
+      )
+
+    self.raster = raster.astype(np.uint8, copy=False)
+
+  @classmethod
+  def from_bytes(cls, data: bytes | memoryview, width: int, height: int) -> "MaskLayer":
+    """Decode MASK section bytes.
+
+    Trailing cells omitted from the section are fully fogged(0xFF), as StarCraft reads them.
+    """
+    count = min(len(data), width * height)
+    raster = np.full(width * height, 0xFF, dtype=np.uint8)
+    raster[:count] = np.frombuffer(data, dtype=np.uint8, count=count)
+
+    return cls(raster.reshape(height, width))
+
+  @classmethod
+  def from_planes(cls, planes: np.ndarray) -> "MaskLayer":
+    """Encode `(8, height, width)` boolean bit-planes, one per player."""
+    if planes.ndim != 3 or planes.shape[0] != 8:
+      raise ValueError(
+        f"Mask planes must be shaped (8, height, width), got {planes.shape}."
+      )
+
+    bits = np.moveaxis(planes.astype(np.uint8, copy=False), 0, -1)
+    return cls(np.packbits(bits, axis=-1, bitorder="little")[..., 0])
+
+  @property
+  def width(self) -> int:
+    return self.raster.shape[1]
+
+  @property
+  def height(self) -> int:
+    return self.raster.shape[0]
+
+  @property
+  def planes(self) -> np.ndarray:
+    """Per-player fog flags, shaped `(8, height, width)`."""
+    bits = np.unpackbits(self.raster[..., np.newaxis], axis=-1, bitorder="little")
+    return np.moveaxis(bits, -1, 0).astype(bool)
+
+  def player(self, player: int) -> np.ndarray:
+    """Fog flags of a single player(0-7), shaped `(height, width)`."""
+    if not 0 <= player < 8:
+      raise IndexError(f"MASK only has flags for player 0-7, got {player}.")
+
+    return (self.raster >> player & 1).astype(bool)
+
+  def mask(self, x: int, y: int) -> chk_types.Mask:
+    return chk_types.Mask(
+      position=spatial.Position(x=x, y=y),
+      flags=chk_types.MaskFlag(int(self.raster[y, x])),
+    )
+
+  def to_bytes(self) -> bytes:
+    return self.raster.tobytes()
+
+  def __len__(self) -> int:
+    return self.raster.size
+
+  def __getitem__(self, index: int) -> chk_types.Mask:
+    if index < 0:
+      index += len(self)
+    if not 0 <= index < len(self):
+      raise IndexError("Mask index out of range")
+
+    y, x = divmod(index, self.width)
+    return self.mask(x, y)
+
+  def __iter__(self) -> Iterator[chk_types.Mask]:
+    for index in range(len(self)):
+      yield self[index]
@@ -0,0 +1,90 @@
+from typing import Callable, Iterator, Mapping, NamedTuple
+from eudplib.core.mapdata.chktok import CHK as EPCHK
+import struct
+
+SECTION_HEADER = struct.Struct("<4si")
+
+
+def section_name(name: str | bytes) -> bytes:
+  """Normalize section name like eudplib does, e.g. `"DIM"` into `b"DIM "`."""
+  encoded = name.encode("ascii") if isinstance(name, str) else name
+  if len(encoded) > 4:
+    raise ValueError(f"Length of section name cannot be longer than 4, got {name!r}")
+
+  return encoded.ljust(4, b" ")
+
+
+class SectionPlan(NamedTuple):
+  """
+  Section payload which is sized before it is written.
+
+  `write` fills a zero-initialized view of exactly `size` bytes in place.
+  """
+
+  size: int
+  write: Callable[[memoryview], None]
+
+  @classmethod
+  def copy(cls, data: bytes | memoryview) -> "SectionPlan":
+    """Payload which is already encoded, copied straight into the view."""
+
+    def write(view: memoryview):
+      view[:] = data
+
+    return cls(len(data), write)
+
+
+class SectionIndex(Mapping[bytes, memoryview]):
+  """
+  Section index over a raw scenario.chk buffer.
+
+  Every section is exposed as a `memoryview` into the original buffer, so reading a section never
+  copies its payload. Parsing follows `eudplib.core.mapdata.chktok.CHK.loadchk`: the last section
+  with the same name wins, a section longer than the remaining buffer is clipped, and a negative
+  section length ends the scan.
+  """
+
+  def __init__(self, buffer: bytes | memoryview):
+    self.buffer = memoryview(buffer).toreadonly()
+    self.sections: dict[bytes, memoryview] = {}
+
+    index = 0
+    while index < len(self.buffer):
+      if index + SECTION_HEADER.size > len(self.buffer):
+        break
+
+      name, length = SECTION_HEADER.unpack_from(self.buffer, index)
+      if length < 0:
+        break
+
+      start = index + SECTION_HEADER.size
+      self.sections[name] = self.buffer[start : start + length]
+      index = start + length
+
+  @classmethod
+  def from_chkt(cls, chkt: EPCHK) -> "SectionIndex":
+    """Index sections which are already tokenized by eudplib, without copying them."""
+    index = cls(b"")
+    index.sections = {
+      name: memoryview(data).toreadonly() for name, data in chkt.sections.items()
+    }
+
+    return index
+
+  def getsection(self, name: str | bytes) -> memoryview:
+    return self.sections[section_name(name)]
+
+  def __getitem__(self, name: str | bytes) -> memoryview:
+    return self.getsection(name)
+
+  def __contains__(self, name: object) -> bool:
+    if not isinstance(name, (str, bytes)):
+      return False
+
+    return section_name(name) in self.sections
+
+  def __iter__(self) -> Iterator[bytes]:
+    return iter(self.sections)
+
+  def __len__(self) -> int:
+    return len(self.sections)
@@ -0,0 +1,95 @@
+from typing import Iterator, Literal, Sequence, overload
+from app.types import chk_types
+import numpy as np
+
+
+class StringTable(Sequence[chk_types.String]):
+  """
+  Lazy STRx/STR string table.
+
+  Only the offset array is read up front. Each string is decoded on first access and cached, so
+  maps with huge briefing or trigger text don't pay for strings nobody reads. Use `decode_all()`
+  when every string is needed.
+
+  Strings are read up to their NUL terminator rather than the next offset, so tables sharing
+  offsets between duplicated strings(like the ones `CHKBuilder.STRx` writes) decode correctly.
+  """
+
+  def __init__(
+    self,
+    data: bytes | memoryview,
+    offset_format: Literal["H", "I"] = "I",
+    encoding: str = "utf-8",
+  ):
+    self.data = memoryview(data)
+    self.encoding = encoding
+
+    dtype = np.dtype(f"<{offset_format}")
+    available = len(self.data) // dtype.itemsize - 1
+    count = (
+      int(np.frombuffer(self.data, dtype=dtype, count=1)[0]) if available >= 0 else 0
+    )
+    count = max(0, min(count, available))
+    self.offsets: list[int] = np.frombuffer(
+      self.data, dtype=dtype, count=count, offset=dtype.itemsize
+    ).tolist()
+    self._cache: dict[int, chk_types.String] = {}
+
+  @classmethod
+  def from_section(
+    cls, data: bytes | memoryview, section: Literal["STRx", "STR "]
+  ) -> "StringTable":
+    return cls(data, "I" if section == "STRx" else "H")
+
+  def _content(self, start: int) -> bytes:
+    """Read NUL-terminated string from `start`, scanning the section in small chunks."""
+    end = start
+    while end < len(self.data):
+      chunk = bytes(self.data[end : end + 256])
+      nul = chunk.find(b"\x00")
+      if nul != -1:
+        return bytes(self.data[start : end + nul])
+      end += len(chunk)
+
+    return bytes(self.data[start:])
+
+  def decode_all(self) -> list[chk_types.String]:
+    """Decode every string at once, reusing strings which are already decoded."""
+    raw = bytes(self.data)
+    for index, start in enumerate(self.offsets):
+      if index not in self._cache:
+        end = raw.find(b"\x00", start)
+        content = raw[start : end if end != -1 else len(raw)].decode(self.encoding)
+        self._cache[index] = chk_types.String(id=index, content=content)
+
+    return [self._cache[index] for index in range(len(self))]
+
+  def __len__(self) -> int:
+    return len(self.offsets)
+
+  @overload
+  def __getitem__(self, index: int) -> chk_types.String: ...
+
+  @overload
+  def __getitem__(self, index: slice) -> list[chk_types.String]: ...
+
+  def __getitem__(
+    self, index: int | slice
+  ) -> chk_types.String | list[chk_types.String]:
+    if isinstance(index, slice):
+      return [self[i] for i in range(*index.indices(len(self)))]
+
+    if index < 0:
+      index += len(self)
+    if not 0 <= index < len(self):
+      raise IndexError("String index out of range")
+
+    if index not in self._cache:
+      content = self._content(self.offsets[index]).decode(self.encoding)
+      self._cache[index] = chk_types.String(id=index, content=content)
+
+    return self._cache[index]
+
+  def __iter__(self) -> Iterator[chk_types.String]:
+    for index in range(len(self)):
+      yield self[index]
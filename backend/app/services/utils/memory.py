@@ -0,0 +1,20 @@
+from contextlib import contextmanager
+from typing import Iterator
+import gc
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+  """
+  Pause cyclic garbage collector while creating lots of acyclic objects at once.
+
+  Converting a map creates hundreds of thousands of models, and every generation 0 collection
+  would traverse all of them again. Reference counting still frees them as usual.
+  """
+  enabled = gc.isenabled()
+  gc.disable()
+  try:
+    yield
+  finally:
+    if enabled:
+      gc.enable()
@@ -0,0 +1,99 @@
+"""
+Benchmark of writing each CHK section against fingerprinting the `Usemap` fragment it is built
+from, to tell whether reusing sections of a previous build could ever pay off.
+
+    python -m app.services.utils.profiling.build [map.scx] [repeat]
+"""
+
+from app.models.definitions.sprite import SpriteDefinition
+from app.models.definitions.tech import (
+  Technology,
+  TechRestriction,
+  Upgrade,
+  UpgradeRestriction,
+)
+from app.models.definitions.unit import UnitDefinition, UnitRestriction
+from app.models.definitions.weapon import WeaponDefinition
+from app.models.entities.location import Location
+from app.models.entities.mask import Mask
+from app.models.entities.sprite import Sprite
+from app.models.entities.tile import Tile
+from app.models.entities.unit import Unit
+from app.models.project import UsemapOptions
+from app.services.io import get_chk, get_map
+from app.services.rawdata.chk import USED_SECTION, CHKBuilder
+from app.services.rawdata.dat import get_dat
+from io import BytesIO
+from pydantic_core import to_json
+import hashlib
+import sys
+import timeit
+
+path = sys.argv[1] if len(sys.argv) > 1 else "example/various_units.scx"
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+with open(path, "rb") as f:
+  content = f.read()
+
+map = get_map(get_chk(BytesIO(content)), get_dat(), UsemapOptions())
+builder = CHKBuilder(map)
+entities, assets = builder.entities, builder.assets
+
+inputs = {
+  "VER": lambda: map.validation,
+  "VCOD": lambda: map.validation,
+  "OWNR": lambda: map.player,
+  "SIDE": lambda: map.player,
+  "COLR": lambda: map.player,
+  "ERA": lambda: map.terrain.tileset,
+  "DIM": lambda: map.terrain.size,
+  "MTXM": lambda: (map.terrain.tiles, entities.of(Tile)),
+  "UNIT": lambda: (entities.of(Unit), assets.of(UnitDefinition)),
+  "PUNI": lambda: assets.of(UnitRestriction),
+  "UNIx": lambda: (assets.of(UnitDefinition), assets.of(WeaponDefinition), map.string),
+  "PUPx": lambda: assets.of(UpgradeRestriction),
+  "UPGx": lambda: assets.of(Upgrade),
+  "THG2": lambda: (entities.of(Sprite), assets.of(SpriteDefinition)),
+  "MASK": lambda: (map.terrain.mask, entities.of(Mask)),
+  "MRGN": lambda: (entities.of(Location), map.string),
+  "STRx": lambda: map.string,
+  "SPRP": lambda: map.scenario_property,
+  "FORC": lambda: (map.player, map.force, map.string),
+  "PTEx": lambda: assets.of(TechRestriction),
+  "TECx": lambda: assets.of(Technology),
+  "MBRF": lambda: map.raw_mbrf_triggers,
+  "TRIG": lambda: map.raw_triggers,
+  "UPRP": lambda: map.unit_properties,
+}
+
+
+def build(name: str):
+  plan = getattr(builder, name)
+  plan.write(memoryview(bytearray(plan.size)))
+
+
+def fingerprint(name: str):
+  hashlib.blake2b(to_json(inputs[name](), bytes_mode="base64"), digest_size=16).digest()
+
+
+def best(run) -> float:
+  # timeit disables gc by default, which would hide its cost.
+  return min(
+    timeit.repeat(run, setup="import gc; gc.enable()", number=1, repeat=repeat)
+  )
+
+
+lines = [
+  f"{path} (best of {repeat})",
+  f"{'section':<8}{'build':>10}{'fingerprint':>14}",
+]
+totals = [0.0, 0.0]
+for name in USED_SECTION:
+  seconds = (best(lambda: build(name)), best(lambda: fingerprint(name)))
+  totals = [total + s for total, s in zip(totals, seconds)]
+  lines.append(f"{name:<8}{seconds[0] * 1000:9.2f}ms{seconds[1] * 1000:12.2f}ms")
+lines.append(f"{'total':<8}{totals[0] * 1000:9.2f}ms{totals[1] * 1000:12.2f}ms")
+
+with open("app/services/utils/profiling/result/build.txt", "w") as f:
+  f.write("\n".join(lines) + "\n")
+print("\n".join(lines))
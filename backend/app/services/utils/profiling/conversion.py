@@ -0,0 +1,52 @@
+"""
+Benchmark of `get_map` construction modes on a full map.
+
+    python -m app.services.utils.profiling.conversion [map.scx] [repeat]
+"""
+
+from app.services.io import get_chk, get_map
+from app.services.rawdata.dat import get_dat
+from app.services.utils import memory
+from contextlib import nullcontext
+from io import BytesIO
+import sys
+import timeit
+
+path = sys.argv[1] if len(sys.argv) > 1 else "example/various_units.scx"
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+with open(path, "rb") as f:
+  content = f.read()
+
+dat = get_dat()
+get_map(get_chk(BytesIO(content)), dat)
+
+
+def convert(trusted: bool) -> list[float]:
+  # timeit disables gc by default, which would hide its cost.
+  return timeit.repeat(
+    lambda: get_map(get_chk(BytesIO(content)), dat, trusted=trusted),
+    setup="import gc; gc.enable()",
+    number=1,
+    repeat=repeat,
+  )
+
+
+paused_gc = memory.paused_gc
+results: dict[str, float] = {}
+
+memory.paused_gc = nullcontext
+results["validated, gc"] = min(convert(False))
+memory.paused_gc = paused_gc
+results["validated, paused gc"] = min(convert(False))
+results["trusted, paused gc"] = min(convert(True))
+
+baseline = results["validated, gc"]
+lines = [f"{path} (best of {repeat})"] + [
+  f"{name:<24}{seconds:8.3f}s  x{baseline / seconds:.2f}"
+  for name, seconds in results.items()
+]
+
+with open("app/services/utils/profiling/result/conversion.txt", "w") as f:
+  f.write("\n".join(lines) + "\n")
+print("\n".join(lines))
@@ -1,2 +1,77 @@
+"""
+Frozen reverse lookup tables(id to default name) of eudplib strdicts.
+
+Each table is built once on first use and shared afterwards, so hot paths can index them per
+entry instead of reversing the whole strdict every time.
+"""
+
+from functools import cache
+from types import MappingProxyType
+from typing import Mapping
+
+
 def reverse_tbl_dict(tbl_dict: dict[str, int]) -> dict[int, str]:
   return {v: k for k, v in tbl_dict.items()}
+
+
+@cache
+def unit_names() -> Mapping[int, str]:
+  from eudplib.core.rawtrigger.strdict import DefUnitDict
+
+  return MappingProxyType(reverse_tbl_dict(DefUnitDict))
+
+
+@cache
+def weapon_names() -> Mapping[int, str]:
+  from eudplib.core.rawtrigger.strdict.weapon import DefWeaponDict
+
+  return MappingProxyType(reverse_tbl_dict(DefWeaponDict))
+
+
+@cache
+def upgrade_names() -> Mapping[int, str]:
+  from eudplib.core.rawtrigger.strdict.upgrade import DefUpgradeDict
+
+  return MappingProxyType(reverse_tbl_dict(DefUpgradeDict))
+
+
+@cache
+def tech_names() -> Mapping[int, str]:
+  from eudplib.core.rawtrigger.strdict.tech import DefTechDict
+
+  return MappingProxyType(reverse_tbl_dict(DefTechDict))
+
+
+@cache
+def image_names() -> Mapping[int, str]:
+  from eudplib.core.rawtrigger.strdict.image import DefImageDict
+
+  return MappingProxyType(reverse_tbl_dict(DefImageDict))
+
+
+@cache
+def flingy_names() -> Mapping[int, str]:
+  from eudplib.core.rawtrigger.strdict.flingy import DefFlingyDict
+
+  return MappingProxyType(reverse_tbl_dict(DefFlingyDict))
+
+
+@cache
+def sprite_names() -> Mapping[int, str]:
+  from eudplib.core.rawtrigger.strdict.sprite import DefSpriteDict
+
+  return MappingProxyType(reverse_tbl_dict(DefSpriteDict))
+
+
+@cache
+def order_names() -> Mapping[int, str]:
+  from eudplib.core.rawtrigger.strdict.unitorder import DefUnitOrderDict
+
+  return MappingProxyType(reverse_tbl_dict(DefUnitOrderDict))
+
+
+@cache
+def portrait_names() -> Mapping[int, str]:
+  from eudplib.core.rawtrigger.strdict.portrait import DefPortraitDict
+
+  return MappingProxyType(reverse_tbl_dict(DefPortraitDict))
@@ -0,0 +1,467 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, Optional, ParamSpec, TypeVar
+from app.core.config import (
+  BUILD_MAX_JOBS_PER_WORKER,
+  BUILD_MAX_PENDING,
+  BUILD_PROCESSES,
+  BUILD_TIMEOUT,
+  IO_THREADS,
+  WORKER_MAX_PENDING,
+  WORKER_PROCESSES,
+)
+from app.core.w_logging import get_logger
+from app.models.build import BuildStatus
+import asyncio
+import functools
+import multiprocessing
+import queue
+import threading
+import time
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+SPAWN_RETRY_MAX_DELAY = 10.0
+"""Longest wait between attempts to spawn a replacement build worker."""
+
+
+class WorkerBusyError(Exception):
+  """Raised when CPU-bound job queue is full."""
+
+
+class BuildTimeoutError(Exception):
+  """Raised when a build runs longer than its timeout. Its worker process is killed."""
+
+
+class BuildWorkerError(Exception):
+  """Raised when a build worker process dies while running a job."""
+
+
+def process_context(preload: tuple[str, ...] = ()) -> BaseContext:
+  """
+  Context starting worker processes from forkserver, which imports `preload` modules once.
+
+  Forking the server itself would copy locks held by its threads(I/O pool, build dispatchers,
+  firebase clients), while forkserver is never threaded. Falls back to spawn where forkserver
+  isn't available.
+  """
+  if "forkserver" not in multiprocessing.get_all_start_methods():
+    return multiprocessing.get_context("spawn")
+
+  context = multiprocessing.get_context("forkserver")
+  context.set_forkserver_preload(list(preload))
+  return context
+
+
+class WorkerPool:
+  """
+  Executors which keep blocking work out of the asyncio event loop.
+
+  CPU-bound work(map parsing and conversion) runs on a process pool, since it holds the GIL for
+  whole request. Blocking I/O like storage calls runs on a separate thread pool, so slow uploads
+  never occupy parsing processes.
+
+  At most `max_pending` CPU-bound jobs run or wait at once, further jobs are rejected with
+  `WorkerBusyError` immediately instead of piling up behind heavy maps. Processes are started
+  by `process_context`, importing `preload` modules once.
+  """
+
+  def __init__(
+    self,
+    processes: int,
+    io_threads: int,
+    max_pending: int,
+    initializer: Optional[Callable[[], object]] = None,
+    preload: tuple[str, ...] = (),
+  ):
+    self.logger = get_logger("workers")
+    self.processes = processes
+    self.io_threads = io_threads
+    self.max_pending = max_pending
+    self.initializer = initializer
+    self.preload = preload
+    self.pending = 0
+
+    self._process_pool: Optional[ProcessPoolExecutor] = None
+    self._io_pool: Optional[ThreadPoolExecutor] = None
+    self._lock = threading.Lock()
+
+  def start(self):
+    with self._lock:
+      if self._process_pool is None:
+        self._process_pool = ProcessPoolExecutor(
+          max_workers=self.processes,
+          mp_context=process_context(self.preload),
+          initializer=self.initializer,
+        )
+      if self._io_pool is None:
+        self._io_pool = ThreadPoolExecutor(
+          max_workers=self.io_threads, thread_name_prefix="webditor-io"
+        )
+
+    self.logger.info(
+      f"Worker pool started. processes: {self.processes}, io threads: {self.io_threads}"
+    )
+
+  def shutdown(self):
+    with self._lock:
+      process_pool, self._process_pool = self._process_pool, None
+      io_pool, self._io_pool = self._io_pool, None
+
+    if process_pool is not None:
+      process_pool.shutdown(cancel_futures=True)
+    if io_pool is not None:
+      io_pool.shutdown(cancel_futures=True)
+
+  @property
+  def process_pool(self) -> ProcessPoolExecutor:
+    if self._process_pool is None:
+      self.start()
+    assert self._process_pool is not None
+    return self._process_pool
+
+  @property
+  def io_pool(self) -> ThreadPoolExecutor:
+    if self._io_pool is None:
+      self.start()
+    assert self._io_pool is not None
+    return self._io_pool
+
+  @property
+  def busy(self) -> bool:
+    return self.pending >= self.max_pending
+
+  async def run_cpu(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """Run picklable `fn` on process pool. Raises `WorkerBusyError` when queue is full."""
+    if self.busy:
+      raise WorkerBusyError(f"{self.pending} jobs are already pending.")
+
+    self.pending += 1
+    try:
+      loop = asyncio.get_running_loop()
+      return await loop.run_in_executor(
+        self.process_pool, functools.partial(fn, *args, **kwargs)
+      )
+    finally:
+      self.pending -= 1
+
+  async def run_io(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """Run blocking `fn` on I/O thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+      self.io_pool, functools.partial(fn, *args, **kwargs)
+    )
+
+
+def warm_up_worker():
+  """Build process-wide DAT definitions registry as soon as worker process starts."""
+  from app.services.rawdata.converter import get_dat_converter
+
+  converter = get_dat_converter()
+  # Flingy definitions build sprite and image definitions too.
+  _ = converter.flingy_definitions
+  _ = converter.orders
+  _ = converter.portraits
+
+
+_job_connection: Optional[Connection] = None
+
+
+def report_progress(phase: BuildStatus):
+  """Report phase of running build to the server. Does nothing outside build workers."""
+  if _job_connection is not None:
+    _job_connection.send(("progress", phase))
+
+
+def serve_jobs(connection: Connection, initializer: Optional[Callable[[], object]]):
+  """Run jobs sent through `connection` one at a time, until it is closed."""
+  global _job_connection
+
+  if initializer is not None:
+    initializer()
+  _job_connection = connection
+
+  while True:
+    try:
+      fn, args, kwargs = connection.recv()
+    except EOFError:
+      return
+
+    try:
+      result = ("result", True, fn(*args, **kwargs))
+    except Exception as e:
+      result = ("result", False, e)
+
+    try:
+      connection.send(result)
+    except Exception as e:
+      error = BuildWorkerError(f"Cannot send back result: {e!r}")
+      connection.send(("result", False, error))
+
+
+class BuildWorker:
+  """Build process running one job at a time, sent through a pipe."""
+
+  def __init__(self, context: BaseContext, initializer: Optional[Callable[[], object]]):
+    self.connection, child = context.Pipe()
+    self.process = context.Process(
+      target=serve_jobs, args=(child, initializer), daemon=True
+    )
+    self.process.start()
+    child.close()
+    self.jobs = 0
+
+  @property
+  def alive(self) -> bool:
+    return not self.connection.closed and self.process.is_alive()
+
+  def run(
+    self,
+    timeout: float,
+    progress: Optional[Callable[[BuildStatus], object]],
+    fn: Callable[..., T],
+    *args,
+    **kwargs,
+  ) -> T:
+    """Run `fn`, passing phases it reports by `report_progress` to `progress`."""
+    self.jobs += 1
+    try:
+      self.connection.send((fn, args, kwargs))
+    except OSError as e:
+      self.stop(graceful=False)
+      raise BuildWorkerError(f"Cannot send job to build worker: {e!r}") from None
+    deadline = time.monotonic() + timeout
+
+    while True:
+      if not self.connection.poll(max(deadline - time.monotonic(), 0)):
+        self.stop(graceful=False)
+        raise BuildTimeoutError(f"Build took longer than {timeout} seconds.")
+
+      try:
+        message = self.connection.recv()
+      except EOFError:
+        self.stop(graceful=False)
+        raise BuildWorkerError(
+          f"Build worker exited with code {self.process.exitcode}."
+        )
+
+      if message[0] == "progress":
+        if progress is not None:
+          progress(message[1])
+        continue
+
+      _, ok, value = message
+      if not ok:
+        raise value
+      return value
+
+  def stop(self, graceful: bool = True):
+    self.connection.close()
+    if graceful:
+      # Closed pipe ends `serve_jobs` loop.
+      self.process.join(timeout=5)
+    if self.process.is_alive():
+      self.process.kill()
+    self.process.join()
+
+
+class BuildWorkerPool:
+  """
+  Pre-started processes building maps by eudplib.
+
+  eudplib keeps map data, payload and trigger allocation as process globals, so a process can
+  only run one build at a time. Workers are forked from forkserver, which imports `preload`
+  modules(eudplib, wengine) once, and `initializer` warms each of them up before its first job.
+
+  A build running longer than `timeout` seconds gets its worker killed, and each worker is
+  replaced by a fresh one after `max_jobs` builds, so leaked eudplib state never piles up. At
+  most `max_pending` builds run or wait at once, further ones are rejected with
+  `WorkerBusyError`.
+  """
+
+  def __init__(
+    self,
+    processes: int,
+    max_pending: int,
+    timeout: float,
+    max_jobs: int,
+    initializer: Optional[Callable[[], object]] = None,
+    preload: tuple[str, ...] = (),
+  ):
+    self.logger = get_logger("workers")
+    self.processes = processes
+    self.max_pending = max_pending
+    self.timeout = timeout
+    self.max_jobs = max_jobs
+    self.initializer = initializer
+    self.preload = preload
+    self.pending = 0
+
+    self.idle: queue.SimpleQueue[BuildWorker] = queue.SimpleQueue()
+    self.workers: set[BuildWorker] = set()
+    self._dispatchers: Optional[ThreadPoolExecutor] = None
+    self._spawner: Optional[ThreadPoolExecutor] = None
+    self._lock = threading.Lock()
+
+  @functools.cached_property
+  def context(self) -> BaseContext:
+    return process_context(self.preload)
+
+  def start(self):
+    """Start every worker process. Blocks until they are started, so run it on I/O pool."""
+    with self._lock:
+      if self._dispatchers is not None:
+        return
+
+      self._dispatchers = ThreadPoolExecutor(
+        max_workers=self.processes, thread_name_prefix="webditor-build"
+      )
+      self._spawner = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="webditor-spawn"
+      )
+      for _ in range(self.processes):
+        self.idle.put(self._spawn())
+
+    self.logger.info(
+      f"Build worker pool started. processes: {self.processes}, timeout: {self.timeout}s"
+    )
+
+  def shutdown(self):
+    with self._lock:
+      dispatchers, self._dispatchers = self._dispatchers, None
+      spawner, self._spawner = self._spawner, None
+
+    if spawner is not None:
+      spawner.shutdown(cancel_futures=True)
+    if dispatchers is not None:
+      dispatchers.shutdown(wait=False, cancel_futures=True)
+
+    with self._lock:
+      workers, self.workers = self.workers, set()
+    for worker in workers:
+      worker.stop(graceful=False)
+
+    while not self.idle.empty():
+      self.idle.get_nowait()
+
+  @property
+  def dispatchers(self) -> ThreadPoolExecutor:
+    if self._dispatchers is None:
+      self.start()
+    assert self._dispatchers is not None
+    return self._dispatchers
+
+  @property
+  def busy(self) -> bool:
+    return self.pending >= self.max_pending
+
+  async def run(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """
+    Run picklable `fn` on a build worker. Raises `WorkerBusyError` when queue is full, and
+    `BuildTimeoutError` when it runs longer than `timeout`.
+    """
+    return await self.run_reporting(None, fn, *args, **kwargs)
+
+  async def run_reporting(
+    self,
+    progress: Optional[Callable[[BuildStatus], object]],
+    fn: Callable[P, T],
+    *args: P.args,
+    **kwargs: P.kwargs,
+  ) -> T:
+    """Same as `run`, and calls `progress` with each phase `fn` reports by `report_progress`."""
+    if self.busy:
+      raise WorkerBusyError(f"{self.pending} builds are already pending.")
+
+    self.pending += 1
+    try:
+      loop = asyncio.get_running_loop()
+      return await loop.run_in_executor(
+        self.dispatchers,
+        functools.partial(self._dispatch, progress, fn, *args, **kwargs),
+      )
+    finally:
+      self.pending -= 1
+
+  def _spawn(self) -> BuildWorker:
+    worker = BuildWorker(self.context, self.initializer)
+    self.workers.add(worker)
+    return worker
+
+  def _dispatch(
+    self,
+    progress: Optional[Callable[[BuildStatus], object]],
+    fn: Callable[..., T],
+    *args: Any,
+    **kwargs: Any,
+  ) -> T:
+    # Dispatchers are as many as workers, so an idle one is there or coming back, unless
+    # replacing workers keeps failing.
+    try:
+      worker = self.idle.get(timeout=self.timeout)
+    except queue.Empty:
+      raise BuildWorkerError(
+        f"No build worker became idle in {self.timeout} seconds."
+      ) from None
+    try:
+      return worker.run(self.timeout, progress, fn, *args, **kwargs)
+    finally:
+      if worker.alive and worker.jobs < self.max_jobs:
+        self.idle.put(worker)
+      elif self._spawner is not None:
+        self._spawner.submit(self._replace, worker)
+
+  def _replace(self, worker: BuildWorker):
+    """
+    Replace killed or worn out worker, out of the way of the job which used it last. Spawning
+    is retried until it succeeds, since the pool would lose the worker for good otherwise.
+    """
+    worker.stop()
+    delay = 1.0
+    while True:
+      with self._lock:
+        self.workers.discard(worker)
+        if self._dispatchers is None:
+          return
+
+        try:
+          replacement = self._spawn()
+          break
+        except Exception as e:
+          self.logger.error(f"Cannot spawn build worker, retrying in {delay}s: {e!r}")
+
+      time.sleep(delay)
+      delay = min(delay * 2, SPAWN_RETRY_MAX_DELAY)
+
+    self.idle.put(replacement)
+    self.logger.debug(f"Build worker was replaced after {worker.jobs} jobs.")
+
+
+def warm_up_build_worker():
+  """Import whole build pipeline and read template map before the first build comes."""
+  from app.services.io import get_template_map
+  import wengine.entities.unit  # noqa: F401
+
+  warm_up_worker()
+  get_template_map()
+
+
+worker_pool = WorkerPool(
+  WORKER_PROCESSES,
+  IO_THREADS,
+  WORKER_MAX_PENDING,
+  initializer=warm_up_worker,
+  preload=("app.services.io",),
+)
+
+build_pool = BuildWorkerPool(
+  BUILD_PROCESSES,
+  BUILD_MAX_PENDING,
+  BUILD_TIMEOUT,
+  BUILD_MAX_JOBS_PER_WORKER,
+  initializer=warm_up_build_worker,
+  preload=("app.services.io",),
+)
@@ -188,6 +188,21 @@ class ScenarioProperty:
   description: String
 
 
+@dataclass
+class PlayerSlot:
+  id: int
+  player_type: PlayerType
+  race: Race
+  unit_count: int
+
+
+@dataclass
+class MapSummary:
+  terrain: Terrain
+  scenario_property: ScenarioProperty
+  players: list[PlayerSlot]
+
+
 @dataclass
 class Validation:
   ver: bytes
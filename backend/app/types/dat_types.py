@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(frozen=True)
 class Image:
   id: int
   name: str
@@ -22,7 +22,7 @@ class Image:
   lift_off_overlay: int
 
 
-@dataclass
+@dataclass(frozen=True)
 class Flingy:
   id: int
   name: str
@@ -35,7 +35,7 @@ class Flingy:
   move_control: int
 
 
-@dataclass
+@dataclass(frozen=True)
 class Order:
   id: int
   name: str
@@ -50,7 +50,7 @@ class Order:
   obscured_order: int
 
 
-@dataclass
+@dataclass(frozen=True)
 class Portrait:
   id: int
   name: str
@@ -59,7 +59,7 @@ class Portrait:
   unknown1: int
 
 
-@dataclass
+@dataclass(frozen=True)
 class Sprite:
   id: int
   name: str
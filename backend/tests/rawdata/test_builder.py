@@ -0,0 +1,31 @@
+import pytest
+import struct
+
+from app.models.string import String
+from app.services.rawdata.chk import CHKBuilder
+
+
+class Map:
+  def __init__(self, strings: list[str]):
+    self.entities = []
+    self.assets = []
+    self.string = [String(id=id, content=content) for id, content in enumerate(strings)]
+
+
+def test_find_string_by_content_resolves_first_duplicate():
+  builder = CHKBuilder(Map(["", "Force 1", "Anywhere", "Force 1"]))  # type: ignore
+
+  assert builder.find_string_by_content("Force 1").id == 1
+  assert builder.find_string_by_content("Anywhere").id == 2
+  with pytest.raises(IndexError):
+    builder.find_string_by_content("Force 2")
+
+
+def test_strx_is_written_in_place():
+  builder = CHKBuilder(Map(["", "Force 1", "Force 1"]))  # type: ignore
+  plan = builder.STRx
+  buffer = bytearray(plan.size)
+
+  plan.write(memoryview(buffer))
+
+  assert bytes(buffer) == struct.pack("<4I", 3, 16, 17, 17) + b"\x00Force 1\x00"
@@ -0,0 +1,27 @@
+from app.services.rawdata.chk import CHK
+from app.services.rawdata.converter import MapConverter, get_dat_converter
+from app.services.rawdata.dat import DAT, get_dat
+
+
+def test_dat_tables_are_built_once():
+  dat = get_dat()
+
+  assert dat is get_dat()
+  assert dat.sprites is dat.sprites
+  assert isinstance(dat.images, tuple)
+
+
+def test_map_converters_share_dat_definitions():
+  first = MapConverter(get_dat(), CHK(raw=b""))
+  second = MapConverter(get_dat(), CHK(raw=b""))
+
+  assert first.sprite_definitions is second.sprite_definitions
+  assert first.orders is get_dat_converter().orders
+  assert MapConverter(DAT(), CHK(raw=b"")).orders is not first.orders
+
+
+def test_dat_rows_match_result():
+  from app.services.rawdata.datdata.scdat import UnitsDat, WeaponsDat
+
+  assert WeaponsDat.row(0) == WeaponsDat.result[0]
+  assert "infestation" not in UnitsDat.row(0) and "infestation" in UnitsDat.row(106)
@@ -0,0 +1,17 @@
+from app.models.asset import Asset
+from app.models.string import String
+from app.models.validation import Validation
+from app.services.rawdata.partition import TypePartition
+
+
+def test_type_partition_keeps_order_per_type():
+  first, second = String(id=1, content="a"), String(id=2, content="b")
+  folder = Asset(name="String", id=-1, type="folder")
+  files = [
+    Asset(name="s", id=i, type="file", data=d) for i, d in enumerate([first, second])
+  ]
+  partition = TypePartition([folder, *files])
+
+  assert partition.of(String) == [first, second]
+  assert partition.of(Validation) == []
+  assert len(partition) == 2
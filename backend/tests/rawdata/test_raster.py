@@ -0,0 +1,50 @@
+import struct
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.models.terrain import RasterLayer
+from app.services.rawdata.raster import MaskLayer, TileLayer
+
+
+def test_tile_layer_decodes_group_and_subtile():
+  mtxm = struct.pack("<4H", 0x0010, 0x0123, 0xFFFF, 0x0007)
+  layer = TileLayer.from_bytes(mtxm, 2, 2)
+
+  assert layer.group.tolist() == [[0x001, 0x012], [0xFFF, 0x000]]
+  assert layer.subtile.tolist() == [[0x0, 0x3], [0xF, 0x7]]
+
+  tile = layer[3]
+  assert (tile.group, tile.id, tile.position.x, tile.position.y) == (0, 7, 1, 1)
+  assert layer.to_bytes() == mtxm
+
+
+def test_tile_layer_pads_short_section():
+  layer = TileLayer.from_bytes(struct.pack("<H", 0x0011), 2, 2)
+
+  assert len(layer) == 4
+  assert layer.to_bytes() == struct.pack("<4H", 0x0011, 0, 0, 0)
+
+
+def test_mask_layer_round_trips_bit_planes():
+  mask = bytes([0b00000001, 0b10000000, 0xFF, 0x00])
+  layer = MaskLayer.from_bytes(mask, 2, 2)
+
+  assert layer.player(0).tolist() == [[True, False], [True, False]]
+  assert layer.player(7).tolist() == [[False, True], [True, False]]
+  assert layer[1].position.x == 1 and layer[1].position.y == 0
+
+  assert MaskLayer.from_planes(layer.planes).to_bytes() == mask
+
+
+def test_raster_layer_is_base64_in_json():
+  layer = TileLayer(np.arange(6, dtype=np.uint16).reshape(2, 3))
+  raster = RasterLayer(dtype="uint16", width=3, height=2, data=layer.to_bytes())
+  restored = RasterLayer.model_validate_json(raster.model_dump_json())
+
+  assert restored.data == layer.to_bytes()
+  assert isinstance(raster.model_dump(mode="json")["data"], str)
+
+  with pytest.raises(ValidationError):
+    RasterLayer(dtype="uint8", width=3, height=2, data=layer.to_bytes())
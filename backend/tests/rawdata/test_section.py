@@ -0,0 +1,45 @@
+import struct
+
+from app.services.rawdata.section import SectionIndex
+from app.services.rawdata.string_table import StringTable
+
+
+def chk_section(name: bytes, data: bytes) -> bytes:
+  return struct.pack("<4sI", name, len(data)) + data
+
+
+def test_section_index_views_original_buffer():
+  raw = chk_section(b"DIM ", struct.pack("<2H", 64, 128)) + chk_section(
+    b"TRIG", b"\x01" * 8
+  )
+  index = SectionIndex(raw)
+
+  assert "DIM" in index
+  assert struct.unpack("<2H", index.getsection("DIM")) == (64, 128)
+  assert isinstance(index.getsection("TRIG"), memoryview)
+  assert index.getsection("TRIG").obj is index.buffer.obj
+
+
+def test_section_index_follows_loadchk_rules():
+  raw = (
+    chk_section(b"ERA ", b"\x00\x00")
+    + chk_section(b"ERA ", b"\x04\x00")
+    + struct.pack("<4sI", b"MTXM", 100)
+    + b"\x01\x00"
+  )
+  index = SectionIndex(raw)
+
+  assert bytes(index.getsection("ERA ")) == b"\x04\x00"
+  assert bytes(index.getsection("MTXM")) == b"\x01\x00"
+
+
+def test_string_table_decodes_lazily():
+  content = b"Name\x00Description\x00"
+  offsets = struct.pack("<3I", 16, 21, 16)
+  table = StringTable(struct.pack("<I", 3) + offsets + content)
+
+  assert len(table) == 3
+  assert table[1].content == "Description"
+  assert list(table._cache) == [1]
+  assert table[-1].content == "Name"
+  assert [s.content for s in table.decode_all()] == ["Name", "Description", "Name"]
@@ -0,0 +1,37 @@
+import struct
+
+from app.services.rawdata.chk import CHK, CHK_STRUCTDICT
+
+
+def chk_section(name: bytes, data: bytes) -> bytes:
+  return struct.pack("<4sI", name, len(data)) + data
+
+
+def unit_record(owner: int) -> bytes:
+  return CHK_STRUCTDICT["UNIT"].pack(
+    0, 32, 32, 0, 0, 0, 0, owner, 100, 100, 100, 0, 0, 0, 0, 0
+  )
+
+
+def test_summary_reads_only_overview_sections():
+  strings = struct.pack("<3I", 2, 12, 17) + b"Name\x00Desc\x00"
+  raw = b"".join(
+    (
+      chk_section(b"DIM ", struct.pack("<2H", 128, 96)),
+      chk_section(b"ERA ", struct.pack("<H", 4)),
+      chk_section(b"OWNR", bytes([6, 5] + [0] * 10)),
+      chk_section(b"SIDE", bytes([1, 2] + [7] * 10)),
+      chk_section(b"SPRP", struct.pack("<2H", 1, 2)),
+      chk_section(b"STRx", strings),
+      chk_section(b"UNIT", b"".join(unit_record(owner) for owner in (0, 0, 1, 11))),
+    )
+  )
+  summary = CHK(raw=raw).summary
+
+  assert (summary.terrain.size.width, summary.terrain.size.height) == (128, 96)
+  assert summary.terrain.tileset == "Installation"
+  assert summary.scenario_property.name.content == "Name"
+  assert summary.scenario_property.description.content == "Desc"
+  assert [p.unit_count for p in summary.players] == [2, 1] + [0] * 9 + [1]
+  assert summary.players[1].player_type == "Computer"
+  assert summary.players[1].race == "Protoss"
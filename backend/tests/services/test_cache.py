@@ -0,0 +1,42 @@
+import os
+
+from app.services.cache import ParseCache, compress, iter_decompress
+
+
+def test_parse_cache_parses_identical_content_once():
+  cache = ParseCache(max_bytes=1 << 20)
+  calls: list[bytes] = []
+
+  def parse() -> bytes:
+    calls.append(b"")
+    return b'{"terrain": {}}'
+
+  key = cache.key(b"map bytes")
+  assert cache.get_or_parse(key, parse) == b'{"terrain": {}}'
+  assert cache.get_or_parse(key, parse) == b'{"terrain": {}}'
+  assert len(calls) == 1
+  assert cache.key(b"map bytes", "normalized") != key
+
+
+def test_parse_cache_evicts_least_recently_used(tmp_path):
+  cache = ParseCache(max_bytes=50)
+  for key in ("a", "b", "c"):
+    cache.put(key, os.urandom(8))
+  cache.get("a")
+  cache.put("d", os.urandom(8))
+
+  assert cache.size <= 50
+  assert "a" in cache.entries and "b" not in cache.entries
+
+  disk = ParseCache(max_bytes=50, directory=str(tmp_path))
+  disk.put("ab", b"cached")
+  assert ParseCache(max_bytes=50, directory=str(tmp_path)).get("ab") == b"cached"
+
+
+def test_compressed_stream_round_trip():
+  serialized = os.urandom(1000) * 10
+  compressed = compress(serialized[i : i + 300] for i in range(0, len(serialized), 300))
+
+  chunks = list(iter_decompress(compressed, chunk_size=4096))
+  assert b"".join(chunks) == serialized
+  assert max(map(len, chunks)) <= 4096
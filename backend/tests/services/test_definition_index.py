@@ -0,0 +1,82 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models.asset import Asset
+from app.models.components.transform import TransformComponent
+from app.models.definitions.image import ImageDefinition
+from app.models.definitions.sprite import SpriteDefinition
+from app.models.entities.sprite import Sprite
+from app.models.player import Player
+from app.models.structs.spatial import Position2D, RectPosition
+from app.services.definition_index import DefinitionIndex
+
+TRANSFORM = TransformComponent(
+  position=Position2D(x=0, y=0), size=RectPosition(left=0, top=0, right=0, bottom=0)
+)
+OWNER = Player(color=0, rgb_color=(0, 0, 0), player_type="Neutral", race="Inactive")
+
+
+def sprite_definition(id: int) -> SpriteDefinition:
+  image = ImageDefinition(
+    id=id,
+    graphic=0,
+    turnable=False,
+    clickable=False,
+    use_full_iscript=False,
+    draw_if_cloaked=False,
+    draw_function=0,
+    remapping=0,
+    iscript_id=0,
+    shield_overlay=0,
+    attack_overlay=0,
+    damage_overlay=0,
+    special_overlay=0,
+    landing_dust_overlay=0,
+    lift_off_overlay=0,
+  )
+  return SpriteDefinition(
+    id=id,
+    image=image,
+    health_bar_id=None,
+    selection_circle_image_id=None,
+    selection_circle_offset=None,
+  )
+
+
+class Map:
+  def __init__(self, assets: list[Asset]):
+    self.assets = assets
+
+
+def test_normalized_sprite_resolves_through_assets():
+  definition = sprite_definition(7)
+  index = DefinitionIndex(Map([Asset(name="s", id=0, type="file", data=definition)]))  # type: ignore
+
+  normalized = Sprite(transform=TRANSFORM, owner=OWNER, flags=0, definition_id=7)
+  embedded = Sprite(
+    transform=TRANSFORM, owner=OWNER, flags=0, definition=sprite_definition(3)
+  )
+
+  assert index.sprite(normalized) is definition
+  assert embedded.definition_id == 3
+  assert index.sprite(embedded).id == 3
+
+  with pytest.raises(ValidationError):
+    Sprite(transform=TRANSFORM, owner=OWNER, flags=0)
+
+
+def test_sprite_left_out_of_assets_falls_back_to_default_definitions():
+  from app.services.io import get_default_definitions
+
+  index = DefinitionIndex(Map([]))  # type: ignore
+  sprite = Sprite(transform=TRANSFORM, owner=OWNER, flags=0, definition_id=10)
+
+  assert index.sprite(sprite) == get_default_definitions().sprite[10]
+
+
+def test_given_partition_is_used_even_when_empty():
+  from app.services.rawdata.partition import TypePartition
+
+  map = Map([Asset(name="s", id=0, type="file", data=sprite_definition(7))])
+
+  assert DefinitionIndex(map, TypePartition([])).sprites == {}  # type: ignore
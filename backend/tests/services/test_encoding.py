@@ -0,0 +1,56 @@
+import json
+
+import msgpack
+from pydantic import BaseModel
+
+from app.models.validation import Validation
+from app.services import encoding
+from app.services.encoding import decode, encode, envelope, iter_encode, negotiate
+
+
+def test_msgpack_keeps_raw_bytes():
+  validation = Validation(vcod=b"\x00\xff" * 4, ver=b"\xcd\x00")
+
+  packed = encode(validation, "msgpack")
+  assert msgpack.unpackb(packed)["vcod"] == b"\x00\xff" * 4
+  assert decode(packed, Validation, "msgpack") == validation
+  assert json.loads(encode(validation, "json"))["ver"] == "cd00"
+
+
+def test_iter_encode_matches_encode(monkeypatch):
+  class Project(BaseModel):
+    name: str
+    entities: list[Validation]
+
+  monkeypatch.setattr(encoding, "STREAM_BATCH_SIZE", 2)
+  for count in (0, 1, 2, 5):
+    entities = [Validation(vcod=bytes([i]), ver=b"\x00") for i in range(count)]
+    project = Project(name="a", entities=entities)
+    for name in ("json", "msgpack"):
+      assert b"".join(iter_encode(project, name)) == encode(project, name)
+
+
+def test_envelope_wraps_encoded_value():
+  raw_map = {"terrain": [1, 2]}
+
+  wrapped = envelope("msgpack", "raw_map", msgpack.packb(raw_map), file_name="a.scx")
+  assert msgpack.unpackb(wrapped) == {"file_name": "a.scx", "raw_map": raw_map}
+
+  wrapped = envelope("json", "raw_map", json.dumps(raw_map).encode(), file_name="a.scx")
+  assert json.loads(wrapped) == {"file_name": "a.scx", "raw_map": raw_map}
+  assert json.loads(envelope("json", "raw_map", b"1")) == {"raw_map": 1}
+
+
+def test_negotiate_defaults_to_json():
+  assert negotiate(None) == "json"
+  assert negotiate("application/json, */*") == "json"
+  assert negotiate("application/msgpack") == "msgpack"
+
+
+def test_negotiate_weighs_q_values():
+  assert negotiate("application/msgpack;q=0") == "json"
+  assert negotiate("application/json, application/msgpack;q=0.5") == "json"
+  assert negotiate("application/json;q=0.5, application/x-msgpack") == "msgpack"
+  assert negotiate("application/msgpack, */*;q=0.1") == "msgpack"
+  assert negotiate("application/*;q=0.2, application/msgpack; q=0.8") == "msgpack"
+  assert negotiate("application/msgpack;q=high, application/json;q=0.1") == "json"
@@ -0,0 +1,41 @@
+from io import BytesIO
+
+import pytest
+
+from app.services import io
+
+
+@pytest.fixture
+def extractors(monkeypatch) -> list[str]:
+  calls = []
+
+  def memfd(content: bytes) -> bytes:
+    calls.append("memfd")
+    raise RuntimeError("Cannot open /proc/self/fd path")
+
+  def tempfile(content: bytes) -> bytes:
+    calls.append("tempfile")
+    if content == b"broken":
+      raise RuntimeError("Not an MPQ")
+    return b"CHK"
+
+  monkeypatch.setattr(io, "_memfd_usable", True)
+  monkeypatch.setattr(io, "extract_scenario_chk_memfd", memfd)
+  monkeypatch.setattr(io, "extract_scenario_chk_tempfile", tempfile)
+  return calls
+
+
+def test_get_scenario_chk_falls_back_to_tempfile(extractors):
+  assert io.get_scenario_chk(BytesIO(b"map")) == b"CHK"
+  assert io.get_scenario_chk(BytesIO(b"map")) == b"CHK"
+
+  assert extractors == ["memfd", "tempfile", "tempfile"]
+  assert not io._memfd_usable
+
+
+def test_get_scenario_chk_keeps_memfd_for_broken_map(extractors):
+  with pytest.raises(RuntimeError, match="Not an MPQ"):
+    io.get_scenario_chk(BytesIO(b"broken"))
+
+  assert extractors == ["memfd", "tempfile"]
+  assert io._memfd_usable
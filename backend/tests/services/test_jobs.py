@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import jobs
+from app.services.cache import BUILD_CACHE_VERSION, ParseCache
+from app.services.io import MapBodyError
+from app.services.jobs import BuildJobs, build_key
+from app.services.workers import WorkerBusyError
+
+
+class FakeBuildPool:
+  """Stands in for `build_pool`, holding every build until `release` is set."""
+
+  def __init__(self):
+    self.busy = False
+    self.pending = 0
+    self.calls = 0
+    self.release = threading.Event()
+    self.result: bytes | Exception = b"SCX"
+
+  async def run_reporting(self, progress, fn, *args):
+    self.calls += 1
+    progress("decoding")
+    while not self.release.is_set():
+      await asyncio.sleep(0.01)
+
+    if isinstance(self.result, Exception):
+      raise self.result
+    return self.result
+
+
+@pytest.fixture
+def build_pool(monkeypatch) -> FakeBuildPool:
+  pool = FakeBuildPool()
+  monkeypatch.setattr(jobs, "build_pool", pool)
+  monkeypatch.setattr(
+    jobs, "build_cache", ParseCache(1 << 20, None, BUILD_CACHE_VERSION, "Build")
+  )
+  return pool
+
+
+async def finish(build_jobs: BuildJobs):
+  await asyncio.gather(*build_jobs.tasks)
+
+
+def test_submit_finishes_cached_body_at_once(build_pool):
+  jobs.build_cache.put(build_key(b"{}", "json"), b"SCX")
+
+  job = asyncio.run(BuildJobs(4).submit(b"{}", "json"))
+
+  assert job.status == "done"
+  assert build_pool.calls == 0
+
+
+def test_submit_joins_running_job(build_pool):
+  build_jobs = BuildJobs(4)
+
+  async def run():
+    first = await build_jobs.submit(b"{}", "json")
+    await asyncio.sleep(0.05)
+    second = await build_jobs.submit(b"{}", "json")
+    status = first.status
+    build_pool.release.set()
+    await finish(build_jobs)
+
+    return first, second, status, await build_jobs.artifact(first)
+
+  first, second, status, artifact = asyncio.run(run())
+
+  assert first is second
+  assert status == "decoding"
+  assert first.status == "done" and artifact == b"SCX"
+  assert build_pool.calls == 1
+  assert build_jobs.running == {}
+
+
+def test_concurrent_submits_start_one_build(build_pool):
+  build_jobs = BuildJobs(4)
+
+  async def run():
+    submitted = await asyncio.gather(
+      build_jobs.submit(b"{}", "json"), build_jobs.submit(b"{}", "json")
+    )
+    build_pool.release.set()
+    await finish(build_jobs)
+
+    return submitted
+
+  first, second = asyncio.run(run())
+
+  assert first is second
+  assert build_pool.calls == 1
+
+
+def test_failed_job_carries_error(build_pool, monkeypatch):
+  monkeypatch.setattr(jobs, "dump_failed_body", lambda body, encoding: "logs/map.json")
+  build_pool.release.set()
+  build_jobs = BuildJobs(4)
+
+  async def run(error: Exception):
+    build_pool.result = error
+    job = await build_jobs.submit(str(error).encode(), "json")
+    await finish(build_jobs)
+    return job
+
+  invalid = asyncio.run(run(MapBodyError("Invalid map body")))
+  crashed = asyncio.run(run(RuntimeError("Build worker exited")))
+
+  assert (invalid.status, invalid.error) == ("failed", "Invalid map body")
+  assert (crashed.status, crashed.error) == ("failed", "Build worker exited")
+  assert build_jobs.running == {}
+
+
+def test_submit_rejects_when_build_pool_is_busy(build_pool):
+  build_pool.busy = True
+
+  with pytest.raises(WorkerBusyError):
+    asyncio.run(BuildJobs(4).submit(b"{}", "json"))
+
+
+def test_build_job_endpoints(build_pool, monkeypatch):
+  from fastapi import FastAPI
+  from fastapi.testclient import TestClient
+  from app.api.v1.endpoints import map as endpoints
+
+  monkeypatch.setattr(endpoints, "build_jobs", BuildJobs(4))
+  app = FastAPI()
+  app.include_router(endpoints.router)
+
+  with TestClient(app) as client:
+    submitted = client.post("/build/jobs", content=b"{}")
+    job_id = submitted.json()["id"]
+    assert submitted.status_code == 202
+    assert client.get(f"/build/jobs/{job_id}").json()["id"] == job_id
+    assert client.get(f"/build/jobs/{job_id}/artifact").status_code == 409
+    assert client.get("/build/jobs/unknown").status_code == 404
+
+    build_pool.release.set()
+    for _ in range(100):
+      if client.get(f"/build/jobs/{job_id}").json()["status"] == "done":
+        break
+      time.sleep(0.01)
+
+    artifact = client.get(f"/build/jobs/{job_id}/artifact")
+    assert (artifact.status_code, artifact.content) == (200, b"SCX")
+
+    jobs.build_cache.entries.clear()
+    assert client.get(f"/build/jobs/{job_id}/artifact").status_code == 410
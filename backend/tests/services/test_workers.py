@@ -0,0 +1,113 @@
+import asyncio
+import os
+import pytest
+import time
+
+from app.services.workers import (
+  BuildTimeoutError,
+  BuildWorker,
+  BuildWorkerError,
+  BuildWorkerPool,
+  WorkerBusyError,
+  WorkerPool,
+  process_context,
+  report_progress,
+)
+
+
+def test_worker_pool_rejects_jobs_over_max_pending():
+  pool = WorkerPool(processes=1, io_threads=1, max_pending=1)
+
+  async def run():
+    return await asyncio.gather(
+      pool.run_cpu(sum, range(10)),
+      pool.run_cpu(sum, range(10)),
+      pool.run_io(len, b"abc"),
+      return_exceptions=True,
+    )
+
+  try:
+    first, second, io_result = asyncio.run(run())
+  finally:
+    pool.shutdown()
+
+  assert first == 45
+  assert isinstance(second, WorkerBusyError)
+  assert io_result == 3
+  assert pool.pending == 0
+
+
+def test_build_worker_pool_recycles_and_times_out_workers():
+  pool = BuildWorkerPool(processes=1, max_pending=2, timeout=2, max_jobs=2)
+
+  async def run():
+    pids = [await pool.run(os.getpid) for _ in range(3)]
+    with pytest.raises(BuildTimeoutError):
+      await pool.run(time.sleep, 10)
+    with pytest.raises(ZeroDivisionError):
+      await pool.run(divmod, 1, 0)
+
+    return pids
+
+  try:
+    pids = asyncio.run(run())
+  finally:
+    pool.shutdown()
+
+  assert pids[0] == pids[1] != pids[2]
+  assert pool.pending == 0
+
+
+def report_phases(phases: list[str]) -> int:
+  for phase in phases:
+    report_progress(phase)
+
+  return len(phases)
+
+
+def test_build_worker_pool_passes_reported_progress():
+  pool = BuildWorkerPool(processes=1, max_pending=1, timeout=10, max_jobs=10)
+  phases: list[str] = []
+
+  try:
+    result = asyncio.run(
+      pool.run_reporting(phases.append, report_phases, ["decoding", "saving"])
+    )
+  finally:
+    pool.shutdown()
+
+  assert result == 2
+  assert phases == ["decoding", "saving"]
+
+
+def test_build_worker_pool_retries_spawning_replacement():
+  pool = BuildWorkerPool(processes=1, max_pending=1, timeout=10, max_jobs=1)
+  pool.start()
+  spawn, failures = pool._spawn, [OSError("Too many open files")]
+
+  def flaky_spawn():
+    if failures:
+      raise failures.pop()
+    return spawn()
+
+  pool._spawn = flaky_spawn  # type: ignore[method-assign]
+
+  async def run():
+    return [await pool.run(os.getpid) for _ in range(2)]
+
+  try:
+    pids = asyncio.run(run())
+  finally:
+    pool.shutdown()
+
+  assert pids[0] != pids[1]
+  assert failures == []
+
+
+def test_build_worker_wraps_broken_pipe():
+  worker = BuildWorker(process_context(), None)
+  worker.process.kill()
+  worker.process.join()
+
+  with pytest.raises(BuildWorkerError):
+    worker.run(1, None, os.getpid)